@@ -1,5 +1,7 @@
 import mpi4py
 
+from ignis.executor.core.IPropertyParser import IPropertyParser
+
 
 class IContext:
 
@@ -7,8 +9,12 @@ class IContext:
 		self.__properties = dict()
 		self.__variables = dict()
 		self._mpi_group = mpi4py.MPI.COMM_WORLD
+		self._thread_id = 0
 
 	def cores(self):
+		# Partitions are only processed by several forked processes when ignis.modules.parallel.fork is enabled
+		if IPropertyParser(self.__properties).parallelFork():
+			return int(self.__properties.get("ignis.executor.cores", 1))
 		return 1
 
 	def executors(self):
@@ -18,7 +24,7 @@ class IContext:
 		return self._mpi_group.Get_rank()
 
 	def threadId(self):
-		return 0
+		return self._thread_id
 
 	def mpiGroup(self):
 		return self._mpi_group
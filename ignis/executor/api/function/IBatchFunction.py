@@ -0,0 +1,16 @@
+from ignis.executor.api.function.IFunction import IFunction
+
+
+class IBatchFunction(IFunction):
+
+	def before(self, context):
+		pass
+
+	def call(self, v, context):
+		return self.callBatch([v], context)[0]
+
+	def callBatch(self, elems, context):
+		pass
+
+	def after(self, context):
+		pass
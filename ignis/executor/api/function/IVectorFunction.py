@@ -0,0 +1,13 @@
+from ignis.executor.api.function.IFunction import IFunction
+
+
+class IVectorFunction(IFunction):
+
+	def before(self, context):
+		pass
+
+	def call(self, array, context):
+		pass
+
+	def after(self, context):
+		pass
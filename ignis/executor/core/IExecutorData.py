@@ -22,9 +22,11 @@ class IExecutorData:
         self.__partition_tools = IPartitionTools(self.__properties, self.__context)
         self.__mpi = IMpi(self.__properties, self.__partition_tools, self.__context)
         self.__partitions = None
+        self.__pipeline = None
         self.__variables = dict()
 
     def getPartitions(self):
+        self.__flushPipeline()
         group = self.__partitions
         if len(group) > 0 and self.__properties.loadType():
             part = group[0]
@@ -45,6 +47,7 @@ class IExecutorData:
     def setPartitions(self, group):
         old = self.__partitions
         self.__partitions = group
+        self.__pipeline = None
         return old
 
     def hasPartitions(self):
@@ -52,6 +55,18 @@ class IExecutorData:
 
     def deletePartitions(self):
         self.__partitions = None
+        self.__pipeline = None
+
+    def getPipeline(self):
+        return self.__pipeline
+
+    def setPipeline(self, pipeline):
+        self.__pipeline = pipeline
+
+    def __flushPipeline(self):
+        if self.__pipeline is not None:
+            pipeline, self.__pipeline = self.__pipeline, None
+            pipeline.execute()
 
     def setVariable(self, key, value):
         self.__variables[key] = value
@@ -96,6 +111,9 @@ class IExecutorData:
         return lib
 
     def loadParameters(self, source):
+        if source.params:
+            # Deferred stages must run with the variables they were submitted with
+            self.__flushPipeline()
         for key, value in source.params.items():
             buffer = IBytesTransport(value)
             proto = IObjectProtocol(buffer)
@@ -5,6 +5,9 @@ import os
 
 import cloudpickle
 
+from ignis.executor.api.function.IBatchFunction import IBatchFunction
+from ignis.executor.core.IReduceOperation import builtinOperations
+
 logger = logging.getLogger(__name__)
 
 
@@ -12,7 +15,7 @@ class ILibraryLoader:
 
 	def __init__(self, properties):
 		self.__properties = properties
-		self.__functions = dict()
+		self.__functions = dict(builtinOperations)
 
 	def loadFuntion(self, name):
 		if name.startswith("lambda") or name.startswith("def"):
@@ -95,7 +98,7 @@ class ILibraryLoader:
 		return cloudpickle.dumps(src)
 
 
-class IFunctionDef:
+class IFunctionDef(IBatchFunction):
 
 	def __init__(self, f):
 		self.call = f
@@ -103,11 +106,18 @@ class IFunctionDef:
 	def before(self, context):
 		pass
 
+	def callBatch(self, elems, context):
+		call = self.call
+		return [call(elem, context) for elem in elems]
+
+	def arity(self):
+		return self.call.__code__.co_argcount - 1
+
 	def after(self, context):
 		pass
 
 
-class IFunctionLambda:
+class IFunctionLambda(IBatchFunction):
 
 	def __init__(self, f):
 		self.f = f
@@ -118,5 +128,12 @@ class IFunctionLambda:
 	def call(self, *args):
 		return self.f(*args[:-1])
 
+	def callBatch(self, elems, context):
+		f = self.f
+		return [f(elem) for elem in elems]
+
+	def arity(self):
+		return self.f.__code__.co_argcount
+
 	def after(self, context):
 		pass
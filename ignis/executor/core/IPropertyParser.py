@@ -24,10 +24,61 @@ class IPropertyParser:
 	def sortResampling(self):
 		return self.getBoolean("ignis.modules.sort.resampling")
 
+	def sortMemory(self):
+		key = "ignis.modules.sort.memory"
+		if key in self.__properties:
+			return self.getSize(key)
+		return None
+
+	def reduceMemory(self):
+		key = "ignis.modules.reduce.memory"
+		if key in self.__properties:
+			return self.getSize(key)
+		return None
+
+	def reduceFanin(self):
+		key = "ignis.modules.reduce.fanin"
+		if key in self.__properties:
+			return self.getMinNumber(key, 2)
+		return 2
+
+	def joinType(self):
+		key = "ignis.modules.join.type"
+		if key in self.__properties:
+			value = self.getString(key)
+			if value not in ("hash", "auto", "broadcast", "sortmerge", "skew"):
+				raise ValueError(key + " error " + value + " is not one of hash, auto, broadcast, sortmerge, skew")
+			return value
+		return "hash"
+
+	def joinBroadcast(self):
+		key = "ignis.modules.join.broadcast"
+		if key in self.__properties:
+			return self.getSize(key)
+		return 10 * 1024 * 1024
+
+	def joinBloom(self):
+		key = "ignis.modules.join.bloom"
+		return key in self.__properties and self.getBoolean(key)
+
 	def loadType(self):
 		key = "ignis.modules.load.type"
 		return key in self.__properties and self.getBoolean(key)
 
+	def pipeFusion(self):
+		key = "ignis.modules.pipe.fusion"
+		return key in self.__properties and self.getBoolean(key)
+
+	def parallelFork(self):
+		key = "ignis.modules.parallel.fork"
+		return key in self.__properties and self.getBoolean(key)
+
+	def batchSize(self):
+		key = "ignis.modules.batch.size"
+		if key in self.__properties:
+			return self.getMinNumber(key, 1)
+		return 1024
+
 	def ioOverwrite(self):
 		return self.getBoolean("ignis.modules.io.overwrite")
 
@@ -49,6 +100,12 @@ class IPropertyParser:
 	def exchangeType(self):
 		return self.getString("ignis.modules.exchange.type")
 
+	def exchangeHash(self):
+		key = "ignis.modules.exchange.hash"
+		if key in self.__properties:
+			return self.getString(key)
+		return "ignis"
+
 	def jobName(self):
 		return self.getString("ignis.job.name")
 
@@ -0,0 +1,100 @@
+import bisect
+import math
+
+
+class IQuantileSketch:
+	# KLL sketch: level h stores elements with weight 2^h, full levels are sorted and half of
+	# their elements are promoted to the next level. Lower levels have smaller capacities.
+	__C = 2 / 3
+
+	def __init__(self, relativeError):
+		if relativeError <= 0 or relativeError >= 1:
+			raise ValueError("relativeError must be in (0, 1), found " + str(relativeError))
+		self.__k = max(8, math.ceil(2 / relativeError))
+		self.__levels = [[]]
+		self.__offsets = [0]
+		self.__n = 0
+		self.__stored = 0
+		# Extremes are kept exact
+		self.__min = None
+		self.__max = None
+		self.__maxSize = self.__capacity(0)
+
+	def __len__(self):
+		return self.__n
+
+	def add(self, elem):
+		if self.__n == 0:
+			self.__min = self.__max = elem
+		elif elem < self.__min:
+			self.__min = elem
+		elif self.__max < elem:
+			self.__max = elem
+		self.__levels[0].append(elem)
+		self.__n += 1
+		self.__stored += 1
+		if self.__stored >= self.__maxSize:
+			self.__compress()
+
+	def merge(self, other):
+		if other.__n == 0:
+			return self
+		if self.__n == 0 or other.__min < self.__min:
+			self.__min = other.__min
+		if self.__n == 0 or self.__max < other.__max:
+			self.__max = other.__max
+		while len(self.__levels) < len(other.__levels):
+			self.__levels.append([])
+			self.__offsets.append(0)
+		for level, elems in zip(self.__levels, other.__levels):
+			level.extend(elems)
+		self.__n += other.__n
+		self.__stored += other.__stored
+		self.__compress()
+		return self
+
+	def quantiles(self, probabilities):
+		if self.__n == 0:
+			return []
+		weighted = sorted((elem, 1 << h) for h, level in enumerate(self.__levels) for elem in level)
+		cumulative = []
+		total = 0
+		for _, w in weighted:
+			total += w
+			cumulative.append(total)
+		result = []
+		for p in probabilities:
+			if p <= 0:
+				result.append(self.__min)
+				continue
+			if p >= 1:
+				result.append(self.__max)
+				continue
+			i = bisect.bisect_left(cumulative, p * total)
+			result.append(weighted[min(i, len(weighted) - 1)][0])
+		return result
+
+	def __capacity(self, h):
+		return max(2, math.ceil(self.__k * self.__C ** (len(self.__levels) - 1 - h)))
+
+	def __compress(self):
+		self.__maxSize = sum(map(self.__capacity, range(len(self.__levels))))
+		while self.__stored >= self.__maxSize:
+			for h in range(len(self.__levels)):
+				level = self.__levels[h]
+				if len(level) < self.__capacity(h):
+					continue
+				if h + 1 == len(self.__levels):
+					self.__levels.append([])
+					self.__offsets.append(0)
+				level.sort()
+				# With an odd size the last element stays in the level
+				keep = [level.pop()] if len(level) % 2 == 1 else []
+				# Alternate the promoted half to avoid a systematic bias
+				offset = self.__offsets[h]
+				self.__offsets[h] = 1 - offset
+				self.__levels[h + 1].extend(level[offset::2])
+				self.__levels[h] = keep
+				self.__stored -= len(level) // 2
+				break
+			self.__maxSize = sum(map(self.__capacity, range(len(self.__levels))))
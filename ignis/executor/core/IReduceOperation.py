@@ -0,0 +1,107 @@
+import operator
+
+from ignis.executor.api.function.IFunction2 import IFunction2
+
+
+class IReduceOperation(IFunction2):
+	# Partial results are tuples, each position is combined with its (python, numpy ufunc) pair
+	_combiners = ()
+	# Operations whose partial results differ from the elements can only reduce values by key
+	_keyOnly = False
+
+	def call(self, v1, v2, context):
+		return self._combiners[0][0](v1, v2)
+
+	def create(self, value):
+		return value,
+
+	def combine(self, a, b):
+		return tuple(f(x, y) for (f, _), x, y in zip(self._combiners, a, b))
+
+	def finish(self, partial):
+		return partial[0]
+
+	def keyOnly(self):
+		return self._keyOnly
+
+	def ufunc(self):
+		# Operations over a single column can be applied element-wise by MPI
+		return self._combiners[0][1] if len(self._combiners) == 1 else None
+
+	def columns(self, values):
+		return values,
+
+	def reduceColumns(self, columns, inverse, first):
+		# Each value is accumulated in place on its group, inverse is the group of each value and first the
+		# position of the first value of each group
+		import numpy
+		result = list()
+		for (_, name), column in zip(self._combiners, columns):
+			ufunc = getattr(numpy, name)
+			if ufunc.identity is None:
+				acum = column[first]
+			else:
+				acum = numpy.full(len(first), ufunc.identity, dtype=column.dtype)
+			ufunc.at(acum, inverse, column)
+			result.append(acum)
+		return tuple(result)
+
+	def finishColumns(self, columns):
+		return columns[0]
+
+
+class ISumOperation(IReduceOperation):
+	_combiners = ((operator.add, "add"),)
+
+
+class IMinOperation(IReduceOperation):
+	_combiners = ((min, "minimum"),)
+
+
+class IMaxOperation(IReduceOperation):
+	_combiners = ((max, "maximum"),)
+
+
+class ICountOperation(IReduceOperation):
+	_combiners = ((operator.add, "add"),)
+	_keyOnly = True
+
+	def call(self, v1, v2, context):
+		raise TypeError("ignis.count is only available as a key reduction")
+
+	def create(self, value):
+		return 1,
+
+	def columns(self, values):
+		import numpy
+		return numpy.ones(len(values), dtype=numpy.int64),
+
+
+class IMeanOperation(IReduceOperation):
+	_combiners = ((operator.add, "add"), (operator.add, "add"))
+	_keyOnly = True
+
+	def call(self, v1, v2, context):
+		raise TypeError("ignis.mean is only available as a key reduction")
+
+	def create(self, value):
+		return value, 1
+
+	def finish(self, partial):
+		return partial[0] / partial[1]
+
+	def columns(self, values):
+		import numpy
+		return values, numpy.ones(len(values), dtype=numpy.int64)
+
+	def finishColumns(self, columns):
+		return columns[0] / columns[1]
+
+
+builtinOperations = {
+	"ignis.sum": ISumOperation,
+	"ignis.min": IMinOperation,
+	"ignis.max": IMaxOperation,
+	"ignis.count": ICountOperation,
+	"ignis.mean": IMeanOperation
+}
@@ -0,0 +1,147 @@
+import enum
+import struct
+import zlib
+
+# Hash used to route elements in shuffles, it must be equal in every executor:
+#   integers: two's complement 64 bits value
+#   floats: as integer when integral, otherwise the mixed IEEE 754 bits
+#   str: bytes hash of utf-8, bytes: adler32 in the high 32 bits and crc32 in the low 32 bits
+#   tuples: (h * 1000003) ^ item combination starting at 0x345678, xor length
+#   frozensets: mixed sum of the mixed items, xor length
+#   enums: tuple of the class qualified name and the member name, int and float enums as their value
+#   None: 0
+# Other hashable types use the built-in hash. It is only equal in every executor when the type defines a
+# __hash__ that does not depend on PYTHONHASHSEED (the default object hash depends on the address), or when
+# all executors share PYTHONHASHSEED.
+
+_MASK = 0xFFFFFFFFFFFFFFFF
+_adler32 = zlib.adler32
+_crc32 = zlib.crc32
+_INT_LIMIT = 2 ** 63
+
+
+def mix64(x):
+	x ^= x >> 33
+	x = (x * 0xFF51AFD7ED558CCD) & _MASK
+	x ^= x >> 33
+	x = (x * 0xC4CEB9FE1A85EC53) & _MASK
+	x ^= x >> 33
+	return x
+
+
+def _int(x):
+	return x & _MASK
+
+
+def _float(x):
+	if x.is_integer() and -_INT_LIMIT <= x < _INT_LIMIT:
+		return int(x) & _MASK
+	return mix64(struct.unpack("<Q", struct.pack("<d", x))[0])
+
+
+def _str(x):
+	return _bytes(x.encode("utf-8"))
+
+
+def _bytes(x):
+	return _adler32(x) << 32 | _crc32(x)
+
+
+def _tuple(x):
+	# Items are combined in a single loop, int and str items are hashed inline without a function call
+	h = 0x345678
+	for item in x:
+		tp = type(item)
+		if tp is int:
+			item = item & _MASK
+		elif tp is str:
+			item = item.encode("utf-8")
+			item = _adler32(item) << 32 | _crc32(item)
+		else:
+			item = shuffleHash(item)
+		h = ((h * 1000003) ^ item) & _MASK
+	return h ^ len(x)
+
+
+def _frozenset(x):
+	h = 0
+	for item in x:
+		h = (h + mix64(shuffleHash(item))) & _MASK
+	return mix64(h ^ len(x))
+
+
+def _none(x):
+	return 0
+
+
+_HASHERS = {
+	int: _int,
+	bool: _int,
+	float: _float,
+	str: _str,
+	bytes: _bytes,
+	bytearray: _bytes,
+	tuple: _tuple,
+	frozenset: _frozenset,
+	type(None): _none
+}
+
+
+def _other(x):
+	# Subclasses and NumPy scalars, int and float subclasses must be equal to their value
+	if isinstance(x, int):
+		return _int(int(x))
+	if isinstance(x, float):
+		return _float(float(x))
+	if isinstance(x, str):
+		return _str(x)
+	if isinstance(x, (bytes, bytearray)):
+		return _bytes(x)
+	if isinstance(x, tuple):
+		return _tuple(x)
+	if isinstance(x, frozenset):
+		return _frozenset(x)
+	if isinstance(x, enum.Enum):
+		return _tuple((type(x).__qualname__, x.name))
+	if hasattr(x, "dtype"):
+		if x.dtype.kind in "biu":
+			return _int(int(x))
+		if x.dtype.kind == "f":
+			return _float(float(x))
+	return hash(x) & _MASK
+
+
+def shuffleHash(x):
+	# Most frequent keys are hashed inline, a function call costs as much as the checksums
+	tp = type(x)
+	if tp is str:
+		x = x.encode("utf-8")
+		return _adler32(x) << 32 | _crc32(x)
+	if tp is int:
+		return x & _MASK
+	if tp is tuple:
+		return _tuple(x)
+	hasher = _HASHERS.get(tp)
+	if hasher is None:
+		return _other(x)
+	return hasher(x)
+
+
+def shuffleHashArray(array):
+	import numpy
+	if array.dtype.kind in "biu":
+		return array.astype(numpy.int64).view(numpy.uint64)
+	if array.dtype.kind == "f":
+		array = array.astype(numpy.float64)
+		with numpy.errstate(invalid="ignore"):
+			integral = (array == numpy.floor(array)) & (array >= -_INT_LIMIT) & (array < _INT_LIMIT)
+			ints = numpy.where(integral, array, 0).astype(numpy.int64).view(numpy.uint64)
+		x = array.view(numpy.uint64).copy()
+		with numpy.errstate(over="ignore"):
+			x ^= x >> numpy.uint64(33)
+			x *= numpy.uint64(0xFF51AFD7ED558CCD)
+			x ^= x >> numpy.uint64(33)
+			x *= numpy.uint64(0xC4CEB9FE1A85EC53)
+			x ^= x >> numpy.uint64(33)
+		return numpy.where(integral, ints, x)
+	return numpy.fromiter((shuffleHash(x) for x in array.tolist()), dtype=numpy.uint64, count=len(array))
@@ -48,6 +48,7 @@ class INumpyWrapper:
 		sz = self.array.size
 		while new_elems > sz:
 			sz = int(sz * 1.5)
+		self.__own()
 		self.array.resize(sz, refcheck=False)
 		self.array[self.__next:self.__next + new_elems] = other.array[0:new_elems]
 		self.__next += new_elems
@@ -55,6 +56,7 @@ class INumpyWrapper:
 
 	def _resize(self, n):
 		if n != len(self.array):
+			self.__own()
 			self.array.resize(n, refcheck=False)
 		self.__next = n
 
@@ -66,6 +68,7 @@ class INumpyWrapper:
 
 	def append(self, obj):
 		if self.array.size == self.__next:
+			self.__own()
 			self.array.resize(int(self.array.size * 1.5), refcheck=False)
 		self.array[self.__next] = obj
 		self.__next += 1
@@ -73,6 +76,11 @@ class INumpyWrapper:
 	def clear(self):
 		self.__next = 0
 
+	def __own(self):
+		# Views (slices of other partitions) can not be resized in place
+		if not self.array.flags.owndata:
+			self.array = self.array.copy()
+
 
 def __readList(protocol):
 	size = IReader._readSizeAux(protocol)
@@ -1,5 +1,34 @@
+import multiprocessing
+import sys
+import traceback
+from itertools import islice
+from multiprocessing import resource_tracker, shared_memory
+
+import cloudpickle
+
 from ignis.executor.core.storage import IMemoryPartition
 from ignis.executor.core.IMpi import MPI
+from ignis.executor.core.IShuffleHash import shuffleHash, shuffleHashArray
+
+
+_SIZE_SAMPLES = 32
+
+
+def _deepSizeof(obj, depth=2):
+    size = sys.getsizeof(obj, 64)
+    if depth == 0:
+        return size
+    if isinstance(obj, (tuple, list, set, frozenset)):
+        items = obj
+    elif isinstance(obj, dict):
+        items = obj.items()
+    else:
+        return size
+    if len(obj) > 0:
+        # Large containers are estimated from their first items
+        sample = list(islice(items, 16))
+        size += sum(_deepSizeof(item, depth - 1) for item in sample) * len(obj) // len(sample)
+    return size
 
 
 class IBaseImpl:
@@ -7,6 +36,35 @@ class IBaseImpl:
         self._executor_data = executor_data
         self.__logger = logger
 
+    def shuffleHash(self):
+        # "python" uses the built-in hash, only valid when every executor shares PYTHONHASHSEED
+        if self._executor_data.getProperties().exchangeHash() == "python":
+            return hash
+        return shuffleHash
+
+    def shuffleHashArray(self):
+        if self._executor_data.getProperties().exchangeHash() == "python":
+            return None
+        return shuffleHashArray
+
+    def elementBytes(self, elems):
+        # Average memory size of a sample of elements, nested containers included
+        if len(elems) == 0:
+            return 0
+        return sum(map(_deepSizeof, elems)) / len(elems)
+
+    def partitionBytes(self, part):
+        # Memory size of the elements, IPartition.bytes() only measures the first element or the serialized data
+        n = len(part)
+        if n == 0:
+            return 0
+        inner = part._inner() if self._executor_data.getPartitionTools().isMemory(part) else None
+        if isinstance(inner, list):
+            sample = inner[::max(1, n // _SIZE_SAMPLES)][:_SIZE_SAMPLES]
+        else:
+            sample = list(islice(iter(part), _SIZE_SAMPLES))
+        return int(self.elementBytes(sample) * n)
+
     def resizeMemoryPartition(self, part, n):
         inner = part._inner()
         cls = part._IMemoryPartition__cls
@@ -22,6 +80,104 @@ class IBaseImpl:
             for i in range(n):
                 writer.write(it.next())
 
+    def executeParallel(self, n, work):
+        # Runs work(0..n-1) like executeParallelBuffers and returns the results in task order
+        if self.__parallelCores(n) < 2:
+            return [work(i) for i in range(n)]
+        results = [None] * n
+
+        def consume(i, buffer):
+            results[i] = cloudpickle.loads(buffer)
+
+        self.executeParallelBuffers(n, lambda i: cloudpickle.dumps(work(i)), consume)
+        return results
+
+    def executeParallelBuffers(self, n, work, consume):
+        # Runs work(0..n-1) in forked processes when ignis.modules.parallel.fork is enabled. The processes see the
+        # parent data as it is before the fork, changes to function state or context variables are not kept.
+        # Each task returns its result as bytes that are written to a shared memory segment, the parent calls
+        # consume(i, buffer) in task order and releases the segment after.
+        cores = self.__parallelCores(n)
+        if cores < 2:
+            for i in range(n):
+                consume(i, work(i))
+            return
+
+        self.__logger.info("Base: executing " + str(n) + " tasks in " + str(cores) + " processes")
+        # Started before the fork so that the processes share it instead of each launching their own
+        resource_tracker.ensure_running()
+        mp = multiprocessing.get_context("fork")
+        workers = list()
+        for thread in range(cores):
+            reader, writer = mp.Pipe(False)
+            free = mp.Semaphore(1)
+            process = mp.Process(target=_parallelWorker, args=(self._executor_data.getContext(), thread, cores, n,
+                                                               work, writer, free))
+            process.start()
+            writer.close()
+            workers.append((process, reader, free))
+
+        # Results are read in task order, a worker blocks until the segment of its previous task is read
+        error = None
+        completed = False
+        try:
+            for i in range(n):
+                thread = i % cores
+                try:
+                    ok, value = workers[thread][1].recv()
+                except EOFError:
+                    ok, value = False, "process " + str(thread) + " exited unexpectedly"
+                if not ok:
+                    error = value
+                    break
+                name, size = value
+                segment = shared_memory.SharedMemory(name=name)
+                try:
+                    with segment.buf[:size] as buffer:
+                        consume(i, buffer)
+                finally:
+                    workers[thread][2].release()
+                    segment.unlink()
+                    segment.close()
+            completed = error is None
+        finally:
+            for process, reader, free in workers:
+                if not completed:
+                    process.terminate()
+                process.join()
+                _releaseSegments(reader)
+                reader.close()
+
+        if error:
+            raise RuntimeError(error)
+
+    def __parallelCores(self, n):
+        if "fork" not in multiprocessing.get_all_start_methods():
+            return 1
+        return min(self._executor_data.getContext().cores(), n)
+
+    def treeMerge(self, value, merge):
+        # Partial values are merged in a k-ary tree, the root obtains the global value
+        executors = self._executor_data.mpi().executors()
+        rank = self._executor_data.mpi().rank()
+        comm = self._executor_data.mpi().native()
+        fanin = self._executor_data.getProperties().reduceFanin()
+
+        self.__logger.info("Base: merging partial results with fan-in " + str(fanin))
+        distance = 1
+        while distance < executors:
+            order = distance * fanin
+            if rank % order != 0:
+                comm.send(value, rank - rank % order, 0)
+                break
+            for i in range(1, fanin):
+                other = rank + i * distance
+                if other >= executors:
+                    break
+                value = merge(value, comm.recv(source=other, tag=0))
+            distance = order
+        return value
+
     def exchange(self, input, output):
         executors = self._executor_data.mpi().executors()
         if executors == 1:
@@ -52,3 +208,32 @@ class IBaseImpl:
         else:
             self.__logger.info("Base: using asynchronous exchange")
             self._executor_data.mpi().exchange_async(input, output)
+
+
+def _parallelWorker(context, thread, cores, n, work, pipe, free):
+    context._thread_id = thread
+    try:
+        for i in range(thread, n, cores):
+            data = work(i)
+            free.acquire()
+            segment = shared_memory.SharedMemory(create=True, size=max(len(data), 1))
+            segment.buf[:len(data)] = data
+            segment.close()
+            pipe.send((True, (segment.name, len(data))))
+    except Exception:
+        pipe.send((False, traceback.format_exc()))
+    finally:
+        pipe.close()
+
+
+def _releaseSegments(pipe):
+    # Segments of results that were not read after an error
+    try:
+        while pipe.poll():
+            ok, value = pipe.recv()
+            if ok:
+                segment = shared_memory.SharedMemory(name=value[0])
+                segment.unlink()
+                segment.close()
+    except Exception:
+        pass
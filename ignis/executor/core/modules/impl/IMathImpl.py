@@ -1,7 +1,10 @@
+import array
+import bisect
 import logging
 import math
 import random
 
+from ignis.executor.core.IQuantileSketch import IQuantileSketch
 from ignis.executor.core.modules.impl.IBaseImpl import IBaseImpl, MPI
 
 logger = logging.getLogger(__name__)
@@ -53,6 +56,249 @@ class IMathImpl(IBaseImpl):
 		self._executor_data.deletePartitions()
 		return n
 
+	def countApproxDistinct(self, relativeSD):
+		input = self._executor_data.getPartitions()
+		bits = self.__hllBits(relativeSD)
+		logger.info("Math: count approx distinct " + str(len(input)) + " partitions with " + str(1 << bits) +
+		            " registers")
+		registers = bytearray(1 << bits)
+		hasher = self.shuffleHash()
+		for part in input:
+			for elem in part:
+				self.__hllAdd(registers, bits, hasher(elem))
+		self._executor_data.deletePartitions()
+
+		logger.info("Math: reducing registers")
+		self._executor_data.mpi().native().Allreduce(MPI.IN_PLACE, [registers, MPI.UNSIGNED_CHAR], op=MPI.MAX)
+		return self.__hllEstimate(registers)
+
+	def countApproxDistinctByKey(self, relativeSD):
+		input = self._executor_data.getAndDeletePartitions()
+		bits = self.__hllBits(relativeSD)
+		logger.info("Math: count approx distinct by key " + str(len(input)) + " partitions with " + str(1 << bits) +
+		            " registers")
+		acum = dict()
+		hasher = self.shuffleHash()
+		for part in input:
+			for key, value in part:
+				registers = acum.get(key)
+				if registers is None:
+					registers = acum[key] = bytearray(1 << bits)
+				self.__hllAdd(registers, bits, hasher(value))
+		del input
+
+		# Only the sketches are exchanged, registers of the same key are merged with max
+		logger.info("Math: exchanging " + str(len(acum)) + " key sketches")
+		executors = self._executor_data.mpi().executors()
+		group = self._executor_data.getPartitionTools().newPartitionGroup(executors)
+		tmp = self._executor_data.getPartitionTools().newPartitionGroup()
+		writers = [part.writeIterator() for part in group]
+		hasher = self.shuffleHash()
+		for item in acum.items():
+			writers[hasher(item[0]) % executors].write(item)
+		acum.clear()
+		self.exchange(group, tmp)
+		for part in tmp:
+			for key, registers in part:
+				if key in acum:
+					acum[key] = bytearray(map(max, acum[key], registers))
+				else:
+					acum[key] = registers
+
+		part = self._executor_data.getPartitionTools().newPartition()
+		writer = part.writeIterator()
+		for key, registers in acum.items():
+			writer.write((key, self.__hllEstimate(registers)))
+
+		output = self._executor_data.getPartitionTools().newPartitionGroup()
+		output.add(part)
+		self._executor_data.setPartitions(output)
+
+	def __hllBits(self, relativeSD):
+		if relativeSD <= 0 or math.ceil(2 * math.log2(1.106 / relativeSD)) > 18:
+			raise ValueError("relativeSD error " + str(relativeSD) + " requires more than 2^18 registers")
+		return max(4, math.ceil(2 * math.log2(1.106 / relativeSD)))
+
+	def __hllAdd(self, registers, bits, h):
+		# splitmix64 finalizer, the hash of integers is the identity
+		x = h & 0xFFFFFFFFFFFFFFFF
+		x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+		x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+		x ^= x >> 31
+		index = x >> (64 - bits)
+		rank = 65 - bits - (x & ((1 << (64 - bits)) - 1)).bit_length()
+		if registers[index] < rank:
+			registers[index] = rank
+
+	def __hllEstimate(self, registers):
+		m = len(registers)
+		if m == 16:
+			alpha = 0.673
+		elif m == 32:
+			alpha = 0.697
+		elif m == 64:
+			alpha = 0.709
+		else:
+			alpha = 0.7213 / (1 + 1.079 / m)
+		estimate = alpha * m * m / sum(2.0 ** -r for r in registers)
+		zeros = registers.count(0)
+		if estimate <= 2.5 * m and zeros > 0:
+			estimate = m * math.log(m / zeros)
+		return int(round(estimate))
+
+	def approxQuantile(self, probabilities, relativeError):
+		for p in probabilities:
+			if p < 0 or p > 1:
+				raise ValueError("probability " + str(p) + " out of range [0, 1]")
+		input = self._executor_data.getPartitions()
+		logger.info("Math: approx quantile " + str(len(input)) + " partitions")
+		sketch = IQuantileSketch(relativeError)
+		for part in input:
+			for elem in part:
+				sketch.add(elem)
+		self._executor_data.deletePartitions()
+
+		sketch = self.treeMerge(sketch, IQuantileSketch.merge)
+		output = self._executor_data.getPartitionTools().newPartitionGroup()
+		if self._executor_data.mpi().isRoot(0):
+			result = self._executor_data.getPartitionTools().newMemoryPartition(len(probabilities))
+			writer = result.writeIterator()
+			for value in sketch.quantiles(probabilities):
+				writer.write(value)
+			output.add(result)
+		self._executor_data.setPartitions(output)
+
+	def stats(self):
+		input = self._executor_data.getPartitions()
+		logger.info("Math: stats " + str(len(input)) + " partitions")
+		acum = (0, 0.0, 0.0, 0, None, None)
+		for part in input:
+			if self.__isNumpy(part):
+				partial = self.__numpyStats(part._inner().usedArray())
+			else:
+				partial = self.__partitionStats(part)
+			acum = self.__mergeStats(acum, partial)
+		self._executor_data.deletePartitions()
+
+		n, mean, m2, total, minimum, maximum = self.treeMerge(acum, self.__mergeStats)
+		output = self._executor_data.getPartitionTools().newPartitionGroup()
+		if self._executor_data.mpi().isRoot(0):
+			result = self._executor_data.getPartitionTools().newMemoryPartition(1, cls=list)
+			result.writeIterator().write({
+				"count": n,
+				"sum": total,
+				"mean": mean if n > 0 else math.nan,
+				"variance": m2 / n if n > 0 else math.nan,
+				"min": minimum,
+				"max": maximum
+			})
+			output.add(result)
+		self._executor_data.setPartitions(output)
+
+	def __partitionStats(self, part):
+		# Welford update, partial stats are (count, mean, m2, sum, min, max)
+		n, mean, m2, total, minimum, maximum = 0, 0.0, 0.0, 0, None, None
+		for x in part:
+			n += 1
+			delta = x - mean
+			mean += delta / n
+			m2 += delta * (x - mean)
+			total += x
+			if minimum is None or x < minimum:
+				minimum = x
+			if maximum is None or x > maximum:
+				maximum = x
+		return n, mean, m2, total, minimum, maximum
+
+	def __numpyStats(self, values):
+		n = len(values)
+		if n == 0:
+			return 0, 0.0, 0.0, 0, None, None
+		mean = values.mean()
+		# Integer sums use python ints like the element path, fixed width can wrap
+		total = int(values.sum(dtype=object)) if values.dtype.kind in "iu" else values.sum().item()
+		return n, mean.item(), ((values - mean) ** 2).sum().item(), total, values.min().item(), values.max().item()
+
+	def __mergeStats(self, a, b):
+		# Chan parallel merge of two partial stats
+		if a[0] == 0:
+			return b
+		if b[0] == 0:
+			return a
+		n = a[0] + b[0]
+		delta = b[1] - a[1]
+		return n, a[1] + delta * b[0] / n, a[2] + b[2] + delta * delta * a[0] * b[0] / n, a[3] + b[3], \
+		       min(a[4], b[4]), max(a[5], b[5])
+
+	def histogram(self, buckets):
+		input = self._executor_data.getPartitions()
+		comm = self._executor_data.mpi().native()
+		if isinstance(buckets, int):
+			if buckets < 1:
+				raise ValueError("histogram requires at least one bucket, found " + str(buckets))
+			minimum = maximum = None
+			for part in input:
+				if self.__isNumpy(part):
+					values = part._inner().usedArray()
+					if len(values) > 0:
+						minimum = values.min().item() if minimum is None else min(minimum, values.min().item())
+						maximum = values.max().item() if maximum is None else max(maximum, values.max().item())
+					continue
+				for x in part:
+					if minimum is None or x < minimum:
+						minimum = x
+					if maximum is None or x > maximum:
+						maximum = x
+			limits = comm.allgather((minimum, maximum))
+			limits = [limit for limit in limits if limit[0] is not None]
+			if not limits:
+				raise ValueError("histogram of an empty dataframe requires explicit buckets")
+			minimum = min(limit[0] for limit in limits)
+			maximum = max(limit[1] for limit in limits)
+			if minimum == maximum:
+				buckets = [minimum, maximum]
+			else:
+				step = (maximum - minimum) / buckets
+				buckets = [minimum + i * step for i in range(buckets)] + [maximum]
+		else:
+			buckets = list(buckets)
+			if len(buckets) < 2 or any(buckets[i] > buckets[i + 1] for i in range(len(buckets) - 1)):
+				raise ValueError("histogram buckets must be at least two sorted boundaries")
+
+		logger.info("Math: histogram " + str(len(input)) + " partitions with " + str(len(buckets) - 1) + " buckets")
+		counts = array.array('q', bytes(8 * (len(buckets) - 1)))
+		last = len(buckets) - 2
+		for part in input:
+			if self.__isNumpy(part):
+				import numpy
+				values = part._inner().usedArray()
+				# The last bucket is closed, values equal to the upper limit belong to it
+				index = numpy.searchsorted(buckets, values, side="right") - 1
+				index[values == buckets[-1]] = last
+				index = index[(index >= 0) & (index <= last)]
+				for i, count in enumerate(numpy.bincount(index, minlength=last + 1).tolist()):
+					counts[i] += count
+			else:
+				for x in part:
+					i = bisect.bisect_right(buckets, x) - 1
+					if x == buckets[-1]:
+						i = last
+					if 0 <= i <= last:
+						counts[i] += 1
+		self._executor_data.deletePartitions()
+
+		comm.Allreduce(MPI.IN_PLACE, [counts, MPI.INT64_T], op=MPI.SUM)
+		output = self._executor_data.getPartitionTools().newPartitionGroup()
+		if self._executor_data.mpi().isRoot(0):
+			result = self._executor_data.getPartitionTools().newMemoryPartition(1, cls=list)
+			result.writeIterator().write((buckets, counts.tolist()))
+			output.add(result)
+		self._executor_data.setPartitions(output)
+
+	def __isNumpy(self, part):
+		return self._executor_data.getPartitionTools().isMemory(part) and \
+		       type(part._inner()).__name__ == 'INumpyWrapper'
+
 	def sampleByKeyFilter(self):
 		input = self._executor_data.getAndDeletePartitions()
 		tmp = self._executor_data.getPartitionTools().newPartitionGroup(len(input))
@@ -133,8 +379,9 @@ class IMathImpl(IBaseImpl):
 		group = self._executor_data.getPartitionTools().newPartitionGroup(executors)
 		tmp = self._executor_data.getPartitionTools().newPartitionGroup(executors)
 		writers = [part.writeIterator() for part in group]
+		hasher = self.shuffleHash()
 		for key,count in acum.items():
-			writers[hash(key) % executors].write((key,count))
+			writers[hasher(key) % executors].write((key,count))
 		self.exchange(group, tmp)
 		acum.clear()
 		for key,count in tmp[0]:
@@ -1,6 +1,11 @@
 import logging
+from itertools import islice
 
+from ignis.executor.api.function.IBatchFunction import IBatchFunction
+from ignis.executor.api.function.IVectorFunction import IVectorFunction
 from ignis.executor.core.modules.impl.IBaseImpl import IBaseImpl, IMemoryPartition
+from ignis.executor.core.transport.IBytesTransport import IBytesTransport
+from ignis.executor.core.transport.IMemoryBuffer import IMemoryBuffer
 
 logger = logging.getLogger(__name__)
 
@@ -42,62 +47,46 @@ class IPipeImpl(IBaseImpl):
         self._executor_data.setPartitions(output)
 
     def map(self, f):
-        context = self._executor_data.getContext()
-        input = self._executor_data.getAndDeletePartitions()
-        f.before(context)
-        output = self._executor_data.getPartitionTools().newPartitionGroup(input)
-        logger.info("General: map " + str(len(input)) + " partitions")
-        for i in range(len(input)):
-            it = output[i].writeIterator()
-            for elem in input[i]:
-                it.write(f.call(elem, context))
-            input[i] = None
-        f.after(context)
-        self._executor_data.setPartitions(output)
+        if isinstance(f, IVectorFunction):
+            self.__vectorize("map", f, lambda array, context: f.call(array, context))
+            return
+        if isinstance(f, IBatchFunction):
+            batch = self.__batch(f)
+            self.__narrow("map", f, lambda it, context: (elem2 for elems in batch(it) for elem2 in
+                                                         f.callBatch(elems, context)))
+            return
+        call = f.call
+        self.__narrow("map", f, lambda it, context: (call(elem, context) for elem in it))
 
     def filter(self, f):
-        context = self._executor_data.getContext()
-        input = self._executor_data.getAndDeletePartitions()
-        f.before(context)
-        output = self._executor_data.getPartitionTools().newPartitionGroup(input)
-        logger.info("General: filter " + str(len(input)) + " partitions")
-        for i in range(len(input)):
-            it = output[i].writeIterator()
-            for elem in input[i]:
-                if f.call(elem, context):
-                    it.write(elem)
-            input[i] = None
-        f.after(context)
-        self._executor_data.setPartitions(output)
+        if isinstance(f, IVectorFunction):
+            self.__vectorize("filter", f, lambda array, context: array[f.call(array, context)])
+            return
+        if isinstance(f, IBatchFunction):
+            batch = self.__batch(f)
+            self.__narrow("filter", f, lambda it, context: (elem for elems in batch(it) for elem, keep in
+                                                            zip(elems, f.callBatch(elems, context)) if keep))
+            return
+        call = f.call
+        self.__narrow("filter", f, lambda it, context: (elem for elem in it if call(elem, context)))
 
     def flatmap(self, f):
-        context = self._executor_data.getContext()
-        input = self._executor_data.getAndDeletePartitions()
-        f.before(context)
-        output = self._executor_data.getPartitionTools().newPartitionGroup(input)
-        logger.info("General: flatmap " + str(len(input)) + " partitions")
-        for i in range(len(input)):
-            it = output[i].writeIterator()
-            for elem in input[i]:
-                for elem2 in f.call(elem, context):
-                    it.write(elem2)
-            input[i] = None
-        f.after(context)
-        self._executor_data.setPartitions(output)
+        if isinstance(f, IBatchFunction):
+            batch = self.__batch(f)
+            self.__narrow("flatmap", f, lambda it, context: (elem2 for elems in batch(it) for result in
+                                                             f.callBatch(elems, context) for elem2 in result))
+            return
+        call = f.call
+        self.__narrow("flatmap", f, lambda it, context: (elem2 for elem in it for elem2 in call(elem, context)))
 
     def keyBy(self, f):
-        context = self._executor_data.getContext()
-        input = self._executor_data.getAndDeletePartitions()
-        f.before(context)
-        output = self._executor_data.getPartitionTools().newPartitionGroup(input)
-        logger.info("General: keyBy " + str(len(input)) + " partitions")
-        for i in range(len(input)):
-            it = output[i].writeIterator()
-            for elem in input[i]:
-                it.write((f.call(elem, context), elem))
-            input[i] = None
-        f.after(context)
-        self._executor_data.setPartitions(output)
+        if isinstance(f, IBatchFunction):
+            batch = self.__batch(f)
+            self.__narrow("keyBy", f, lambda it, context: (pair for elems in batch(it) for pair in
+                                                           zip(f.callBatch(elems, context), elems)))
+            return
+        call = f.call
+        self.__narrow("keyBy", f, lambda it, context: ((call(elem, context), elem) for elem in it))
 
     def mapWithIndex(self, f):
         context = self._executor_data.getContext()
@@ -181,6 +170,8 @@ class IPipeImpl(IBaseImpl):
                 aux.add(part)
             input = aux
         f.after(context)
+        # Elements are modified in place, keys may have changed
+        input.setPartitioner(None)
         self._executor_data.setPartitions(input)
 
     def mapExecutorTo(self, f):
@@ -311,30 +302,156 @@ class IPipeImpl(IBaseImpl):
         self._executor_data.setPartitions(output)
 
     def flatMapValues(self, f):
+        call = f.call
+        self.__narrow("flatMapValues", f,
+                      lambda it, context: ((key, value2) for key, value in it for value2 in call(value, context)),
+                      keepsKeys=True)
+
+    def mapValues(self, f):
+        if isinstance(f, IBatchFunction):
+            batch = self.__batch(f)
+            self.__narrow("mapValues", f, lambda it, context: (
+                (elem[0], value) for elems in batch(it) for elem, value in
+                zip(elems, f.callBatch([elem[1] for elem in elems], context))), keepsKeys=True)
+            return
+        call = f.call
+        self.__narrow("mapValues", f, lambda it, context: ((key, call(value, context)) for key, value in it),
+                      keepsKeys=True)
+
+    def __batch(self, f):
+        size = self._executor_data.getProperties().batchSize()
+        logger.info("General: calling " + type(f).__name__ + " in batches of " + str(size) + " elements")
+
+        def batch(it):
+            elems = list(islice(it, size))
+            while elems:
+                yield elems
+                elems = list(islice(it, size))
+
+        return batch
+
+    def __narrow(self, name, f, stage, keepsKeys=False):
+        pipeline = self._executor_data.getPipeline()
+        if pipeline is None:
+            pipeline = IPipeline(self)
+        pipeline.add(name, f, stage, keepsKeys)
+        if self._executor_data.getProperties().pipeFusion():
+            logger.info("General: fusing " + name + " into a pipeline of " + str(len(pipeline)) + " operations")
+            self._executor_data.setPipeline(pipeline)
+        else:
+            pipeline.execute()
+
+    def __vectorize(self, name, f, apply):
         context = self._executor_data.getContext()
         input = self._executor_data.getAndDeletePartitions()
         f.before(context)
-        output = self._executor_data.getPartitionTools().newPartitionGroup(input)
-        logger.info("General: flatMapValues " + str(len(input)) + " partitions")
+        output = self._executor_data.getPartitionTools().newPartitionGroup()
+        logger.info("General: vectorized " + name + " " + str(len(input)) + " partitions")
         for i in range(len(input)):
-            it = output[i].writeIterator()
-            for key, value in input[i]:
-                for value2 in f.call(value, context):
-                    it.write((key, value2))
+            part = input[i]
+            if self._executor_data.getPartitionTools().isMemory(part) and \
+                    type(part._inner()).__name__ == 'INumpyWrapper':
+                from ignis.executor.core.io.INumpy import INumpyWrapper
+                result = apply(part._inner().usedArray(), context)
+                new_part = self._executor_data.getPartitionTools().newNumpyMemoryPartition(result.dtype, len(result))
+                elements = new_part._inner()
+                elements += INumpyWrapper(array=result)
+            else:
+                result = apply(self.__scalarArray(name, part), context)
+                new_part = self._executor_data.getPartitionTools().newPartition(part)
+                writer = new_part.writeIterator()
+                for elem in result.tolist():
+                    writer.write(elem)
+            output.add(new_part)
             input[i] = None
         f.after(context)
         self._executor_data.setPartitions(output)
 
-    def mapValues(self, f):
+    def __scalarArray(self, name, part):
+        import numpy
+        elems = list(part)
+        # Containers or mixed types would change the element type when converted back from the array
+        if len(elems) > 0:
+            tp = type(elems[0])
+            if tp not in (bool, int, float, complex, str) or any(type(elem) is not tp for elem in elems):
+                raise TypeError("vectorized " + name + " requires elements of a single scalar type, found " +
+                                ", ".join(sorted({type(elem).__name__ for elem in elems})))
+        array = numpy.array(elems)
+        if array.dtype == object:
+            raise TypeError("vectorized " + name + " can not store the elements in a numpy array")
+        return array
+
+    def _executePipeline(self, pipeline):
         context = self._executor_data.getContext()
         input = self._executor_data.getAndDeletePartitions()
-        f.before(context)
+        for f in pipeline.functions():
+            f.before(context)
         output = self._executor_data.getPartitionTools().newPartitionGroup(input)
-        logger.info("General: flatMapValues " + str(len(input)) + " partitions")
-        for i in range(len(input)):
-            it = output[i].writeIterator()
-            for key, value in input[i]:
-                it.write((key, f.call(value, context)))
-            input[i] = None
-        f.after(context)
+        logger.info("General: " + pipeline.name() + " " + str(len(input)) + " partitions")
+        if context.cores() > 1 and len(input) > 1:
+            native = self._executor_data.getProperties().nativeSerialization()
+
+            def work(i):
+                part = self._executor_data.getPartitionTools().newMemoryPartition()
+                it = part.writeIterator()
+                for elem in pipeline.apply(input[i], context):
+                    it.write(elem)
+                buffer = IMemoryBuffer(part.bytes())
+                part.write(buffer, 0, native)
+                return buffer.getBufferAsBytes()
+
+            def consume(i, buffer):
+                output[i].read(IBytesTransport(buffer))
+                input[i] = None
+
+            self.executeParallelBuffers(len(input), work, consume)
+        else:
+            for i in range(len(input)):
+                it = output[i].writeIterator()
+                for elem in pipeline.apply(input[i], context):
+                    it.write(elem)
+                input[i] = None
+        for f in pipeline.functions():
+            f.after(context)
+        if pipeline.keepsKeys():
+            output.setPartitioner(input.partitioner())
         self._executor_data.setPartitions(output)
+
+
+# Narrow transformations applied in a single pass over each partition
+class IPipeline:
+
+    def __init__(self, impl):
+        self.__impl = impl
+        self.__names = list()
+        self.__functions = list()
+        self.__stages = list()
+        self.__keepsKeys = True
+
+    def add(self, name, f, stage, keepsKeys=False):
+        self.__names.append(name)
+        self.__functions.append(f)
+        self.__stages.append(stage)
+        self.__keepsKeys = self.__keepsKeys and keepsKeys
+
+    def keepsKeys(self):
+        # True when no stage can move an element to another key
+        return self.__keepsKeys
+
+    def name(self):
+        return "->".join(self.__names)
+
+    def functions(self):
+        return self.__functions
+
+    def apply(self, part, context):
+        elems = iter(part)
+        for stage in self.__stages:
+            elems = stage(elems, context)
+        return elems
+
+    def execute(self):
+        self.__impl._executePipeline(self)
+
+    def __len__(self):
+        return len(self.__stages)
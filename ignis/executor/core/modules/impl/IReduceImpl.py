@@ -1,12 +1,20 @@
+import heapq
 import logging
 import math
+from collections import Counter
+from itertools import chain, groupby, islice
+from operator import itemgetter
 
+from ignis.executor.core.IMpi import MPI
+from ignis.executor.core.IReduceOperation import IReduceOperation
+from ignis.executor.core.IShuffleHash import mix64
 from ignis.executor.core.modules.impl.IBaseImpl import IBaseImpl
 
 logger = logging.getLogger(__name__)
 
 
 class IReduceImpl(IBaseImpl):
+	__NATIVE_OPS = {"add": MPI.SUM, "minimum": MPI.MIN, "maximum": MPI.MAX}
 
 	def __init__(self, executor_data):
 		IBaseImpl.__init__(self, executor_data, logger)
@@ -15,19 +23,26 @@ class IReduceImpl(IBaseImpl):
 		input = self._executor_data.getAndDeletePartitions()
 		logger.info("Reduce: reducing " + str(len(input)) + " partitions locally")
 
-		acum = None
-		for i in range(len(input)):
+		def work(i):
 			part = input[i]
+			input[i] = None
 			if len(part) == 0:
+				return False, None
+			return True, self.__reducePartition(f, part)
+
+		context = self._executor_data.getContext()
+		acum = None
+		found = False
+		for nonempty, value in self.executeParallel(len(input), work):
+			if not nonempty:
 				continue
-			if acum:
-				acum = self.__aggregatePartition(f, part, acum)
-			else:
-				acum = self.__reducePartition(f, part)
-			input[i] = None
-		result.writeIterator().write(acum)
+			acum = f.call(acum, value, context) if found else value
+			found = True
+		if found:
+			result.writeIterator().write(acum)
 
 	def reduce(self, f):
+		self.__checkOperation(f)
 		context = self._executor_data.getContext()
 		f.before(context)
 		elem_part = self._executor_data.getPartitionTools().newMemoryPartition(1)
@@ -36,6 +51,7 @@ class IReduceImpl(IBaseImpl):
 		f.after(context)
 
 	def treeReduce(self, f):
+		self.__checkOperation(f)
 		context = self._executor_data.getContext()
 		f.before(context)
 		elem_part = self._executor_data.getPartitionTools().newMemoryPartition(1)
@@ -57,6 +73,7 @@ class IReduceImpl(IBaseImpl):
 		partial_reduce = self._executor_data.getPartitionTools().newMemoryPartition(1)
 		logger.info("Reduce: aggregating " + str(len(input)) + " partitions locally")
 
+		# The zero value is applied once per executor, so the partitions are aggregated sequentially
 		acum = self._executor_data.getVariable("zero")
 		for i in range(len(input)):
 			part = input[i]
@@ -70,40 +87,18 @@ class IReduceImpl(IBaseImpl):
 		self._executor_data.setPartitions(output)
 
 	def fold(self, f):
+		self.__checkOperation(f)
 		context = self._executor_data.getContext()
 		f.before(context)
-		input = self._executor_data.getAndDeletePartitions()
-		partial_reduce = self._executor_data.getPartitionTools().newMemoryPartition(1)
-		logger.info("Reduce: folding " + str(len(input)) + " partitions locally")
-
-		acum = self._executor_data.getVariable("zero")
-		for i in range(len(input)):
-			part = input[i]
-			if len(part) == 0:
-				continue
-			acum = self.__aggregatePartition(f, part, acum)
-			input[i] = None
-
-		partial_reduce.writeIterator().write(acum)
-		self.__finalReduce(f, partial_reduce)
+		logger.info("Reduce: folding partitions locally")
+		self.__finalReduce(f, self.__localFold(f))
 
 	def treeFold(self, f):
+		self.__checkOperation(f)
 		context = self._executor_data.getContext()
 		f.before(context)
-		input = self._executor_data.getAndDeletePartitions()
-		partial_reduce = self._executor_data.getPartitionTools().newMemoryPartition(1)
-		logger.info("Reduce: folding " + str(len(input)) + " partitions locally")
-
-		acum = self._executor_data.getVariable("zero")
-		for i in range(len(input)):
-			part = input[i]
-			if len(part) == 0:
-				continue
-			acum = self.__aggregatePartition(f, part, acum)
-			input[i] = None
-
-		partial_reduce.writeIterator().write(acum)
-		self.__finalTreeReduce(f, partial_reduce)
+		logger.info("Reduce: folding partitions locally")
+		self.__finalTreeReduce(f, self.__localFold(f))
 
 	def union(self, other, preserveOrder):
 		input = self._executor_data.getPartitions()
@@ -164,40 +159,325 @@ class IReduceImpl(IBaseImpl):
 		self._executor_data.setPartitions(output)
 
 	def join(self, other, numPartitions):
+		self.__join(other, numPartitions, "inner")
+
+	def leftOuterJoin(self, other, numPartitions):
+		self.__join(other, numPartitions, "left")
+
+	def rightOuterJoin(self, other, numPartitions):
+		self.__join(other, numPartitions, "right")
+
+	def fullOuterJoin(self, other, numPartitions):
+		self.__join(other, numPartitions, "full")
+
+	def __join(self, other, numPartitions, how):
+		tp = self._executor_data.getProperties().joinType()
+		if how == "inner" and tp not in ("hash", "sortmerge", "skew"):
+			input1 = self._executor_data.getPartitions()
+			input2 = self._executor_data.getVariable(other)
+			bytes1 = self._executor_data.mpi().native().allreduce(sum(map(self.partitionBytes, input1)))
+			bytes2 = self._executor_data.mpi().native().allreduce(sum(map(self.partitionBytes, input2)))
+			if tp == "broadcast" or min(bytes1, bytes2) <= self._executor_data.getProperties().joinBroadcast():
+				self._executor_data.removeVariable(other)
+				self.__broadcastJoin(input1, input2, bytes1 <= bytes2, numPartitions)
+				return
+		if how != "full" and self._executor_data.getProperties().joinBloom():
+			self.__bloomFilter(other, how)
+		if how == "inner" and tp == "skew":
+			input1 = self._executor_data.getPartitions()
+			input2 = self._executor_data.getVariable(other)
+			self._executor_data.removeVariable(other)
+			self.__skewJoin(input1, input2, numPartitions)
+			return
+
 		logger.info("Reduce: preparing first partitions")
-		self.__keyHashing(numPartitions)
-		self.__exchanging()
+		self.__keyPartitioning(numPartitions)
 		input1 = self._executor_data.getAndDeletePartitions()
 
 		logger.info("Reduce: preparing second partitions")
 		self._executor_data.setPartitions(self._executor_data.getVariable(other))
 		self._executor_data.removeVariable(other)
-		self.__keyHashing(numPartitions)
-		self.__exchanging()
+		self.__keyPartitioning(numPartitions)
 		input2 = self._executor_data.getAndDeletePartitions()
 
-		logger.info("Reduce: joining key elements")
 		output = self._executor_data.getPartitionTools().newPartitionGroup(numPartitions)
+		left = how in ("left", "full")
+		right = how in ("right", "full")
+		if tp == "sortmerge":
+			logger.info("Reduce: joining key elements using sort merge")
+			for p in range(len(input1)):
+				self.__sortMergeJoin(input1[p], input2[p], output[p].writeIterator(), left, right)
+				input1[p] = None
+				input2[p] = None
+		else:
+			logger.info("Reduce: joining key elements")
+			for p in range(len(input1)):
+				self.__hashJoin(input1[p], input2[p], output[p].writeIterator(), left, right)
+				input1[p] = None
+				input2[p] = None
 
+		output.setPartitioner(input1.partitioner())
+		self._executor_data.setPartitions(output)
+
+	def __hashJoin(self, part1, part2, writer, left, right):
 		acum = dict()
-		for p in range(len(input1)):
-			for key, value in input1[p]:
-				if key in acum:
-					acum[key].append(value)
+		for key, value in part1:
+			if key in acum:
+				acum[key].append(value)
+			else:
+				acum[key] = [value]
+
+		matched = set() if left else None
+		for key, value2 in part2:
+			if key in acum:
+				for value1 in acum[key]:
+					writer.write((key, (value1, value2)))
+				if left:
+					matched.add(key)
+			elif right:
+				writer.write((key, (None, value2)))
+
+		if left:
+			for key, values in acum.items():
+				if key not in matched:
+					for value1 in values:
+						writer.write((key, (value1, None)))
+
+	def __sortMergeJoin(self, part1, part2, writer, left, right):
+		# Both sides are streamed in key order, only one key group of the first side is kept in memory
+		budget = self._executor_data.getProperties().reduceMemory()
+		groups1 = groupby(self.__sortedPairs(part1, budget), key=itemgetter(0))
+		groups2 = groupby(self.__sortedPairs(part2, budget), key=itemgetter(0))
+		group1 = next(groups1, None)
+		group2 = next(groups2, None)
+		while group1 is not None and group2 is not None:
+			key1, key2 = group1[0], group2[0]
+			if key1 < key2:
+				if left:
+					for key, value1 in group1[1]:
+						writer.write((key, (value1, None)))
+				group1 = next(groups1, None)
+			elif key2 < key1:
+				if right:
+					for key, value2 in group2[1]:
+						writer.write((key, (None, value2)))
+				group2 = next(groups2, None)
+			else:
+				values1 = [value1 for _, value1 in group1[1]]
+				for key, value2 in group2[1]:
+					for value1 in values1:
+						writer.write((key, (value1, value2)))
+				group1 = next(groups1, None)
+				group2 = next(groups2, None)
+
+		while left and group1 is not None:
+			for key, value1 in group1[1]:
+				writer.write((key, (value1, None)))
+			group1 = next(groups1, None)
+		while right and group2 is not None:
+			for key, value2 in group2[1]:
+				writer.write((key, (None, value2)))
+			group2 = next(groups2, None)
+
+	def __sortedPairs(self, part, budget):
+		if budget is None or part.empty():
+			return sorted(part, key=itemgetter(0))
+		elems = iter(part)
+		sample = list(islice(elems, 32))
+		run_size = max(1, int(budget / max(self.elementBytes(sample), 1)))
+		if len(part) <= run_size:
+			return sorted(part, key=itemgetter(0))
+		runs = list()
+		elems = chain(sample, elems)
+		while True:
+			run = list(islice(elems, run_size))
+			if not run:
+				break
+			run.sort(key=itemgetter(0))
+			disk_run = self._executor_data.getPartitionTools().newDiskPartition()
+			writer = disk_run.writeIterator()
+			for elem in run:
+				writer.write(elem)
+			runs.append(disk_run)
+		logger.info("Reduce: merging " + str(len(runs)) + " sorted runs of " + str(run_size) + " elements")
+		return heapq.merge(*runs, key=itemgetter(0))
+
+	def __bloomFilter(self, other, how):
+		# Elements without a possible match are dropped before the shuffle, outer sides are never filtered
+		input1 = self._executor_data.getPartitions()
+		input2 = self._executor_data.getVariable(other)
+		count1 = self._executor_data.mpi().native().allreduce(sum(len(part) for part in input1))
+		count2 = self._executor_data.mpi().native().allreduce(sum(len(part) for part in input2))
+		if how == "inner":
+			filterFirst = count1 > count2
+		else:
+			filterFirst = how == "right"
+		source, target = (input2, input1) if filterFirst else (input1, input2)
+
+		n = max(1, count2 if filterFirst else count1)
+		bits = max(64, int(-n * math.log(0.01) / (math.log(2) ** 2)))
+		hashes = max(1, round(bits / n * math.log(2)))
+		logger.info("Reduce: building bloom filter of " + str(bits) + " bits with " + str(hashes) + " hashes")
+		table = bytearray(int((bits + 7) / 8))
+		hasher = self.shuffleHash()
+		for part in source:
+			for key, value in part:
+				for index in self.__bloomIndexes(hasher, key, bits, hashes):
+					table[index >> 3] |= 1 << (index & 7)
+		self._executor_data.mpi().native().Allreduce(MPI.IN_PLACE, [table, MPI.BYTE], op=MPI.BOR)
+
+		output = self._executor_data.getPartitionTools().newPartitionGroup(target)
+		cache = target.cache()
+		total = 0
+		kept = 0
+		for i in range(len(target)):
+			part = target[i]
+			writer = output[i].writeIterator()
+			for elem in part:
+				total += 1
+				for index in self.__bloomIndexes(hasher, elem[0], bits, hashes):
+					if not table[index >> 3] & (1 << (index & 7)):
+						break
 				else:
-					acum[key] = [value]
-			input1[p] = None
-			writer = output[p].writeIterator()
+					kept += 1
+					writer.write(elem)
+			if not cache:
+				part.clear()
+		output.setPartitioner(target.partitioner())
+		logger.info("Reduce: bloom filter kept " + str(kept) + " of " + str(total) + " elements")
 
-			for key, value2 in input2[p]:
-				if key in acum:
-					for value1 in acum[key]:
-						writer.write((key, (value1, value2)))
+		if filterFirst:
+			self._executor_data.setPartitions(output)
+		else:
+			self._executor_data.setVariable(other, output)
+
+	def __bloomIndexes(self, hasher, key, bits, hashes):
+		h1 = hasher(key) & 0xFFFFFFFFFFFFFFFF
+		h2 = mix64(h1 ^ bits) | 1
+		return ((h1 + i * h2) % bits for i in range(hashes))
+
+	def __skewJoin(self, input1, input2, numPartitions):
+		# Heavy keys of the large side are salted across several partitions, the other side is replicated to all of them
+		count1 = self._executor_data.mpi().native().allreduce(sum(len(part) for part in input1))
+		count2 = self._executor_data.mpi().native().allreduce(sum(len(part) for part in input2))
+		largeFirst = count1 >= count2
+		heavy = self.__heavyKeys(input1 if largeFirst else input2, numPartitions)
+
+		logger.info("Reduce: preparing first partitions")
+		self._executor_data.setPartitions(input1)
+		self.__saltedHashing(numPartitions, heavy, not largeFirst)
+		self.__exchanging()
+		input1 = self._executor_data.getAndDeletePartitions()
+
+		logger.info("Reduce: preparing second partitions")
+		self._executor_data.setPartitions(input2)
+		self.__saltedHashing(numPartitions, heavy, largeFirst)
+		self.__exchanging()
+		input2 = self._executor_data.getAndDeletePartitions()
+
+		logger.info("Reduce: joining key elements")
+		output = self._executor_data.getPartitionTools().newPartitionGroup(numPartitions)
+		for p in range(len(input1)):
+			self.__hashJoin(input1[p], input2[p], output[p].writeIterator(), False, False)
+			input1[p] = None
 			input2[p] = None
-			acum.clear()
 
 		self._executor_data.setPartitions(output)
 
+	def __heavyKeys(self, input, numPartitions):
+		counts = Counter()
+		local = 0
+		for part in input:
+			size = len(part)
+			local += size
+			step = max(1, int(size / 1000))
+			for key, value in islice(part, 0, None, step):
+				counts[key] += step
+
+		# A key is heavy when it is larger than an average partition
+		gathered = self._executor_data.mpi().native().allgather((local, counts.most_common(numPartitions)))
+		total = sum(local for local, _ in gathered)
+		counts.clear()
+		for _, candidates in gathered:
+			counts.update(dict(candidates))
+		threshold = max(1, total / numPartitions)
+		heavy = dict()
+		for key, count in counts.items():
+			if count > threshold:
+				heavy[key] = min(numPartitions, math.ceil(count / threshold))
+				if self._executor_data.mpi().isRoot(0):
+					logger.info("Reduce: heavy key " + str(key) + " with ~" + str(count) + " elements salted across " +
+					            str(heavy[key]) + " partitions")
+		if self._executor_data.mpi().isRoot(0) and not heavy:
+			logger.info("Reduce: no heavy keys found")
+		return heavy
+
+	def __saltedHashing(self, numPartitions, heavy, replicate):
+		input = self._executor_data.getAndDeletePartitions()
+		output = self._executor_data.getPartitionTools().newPartitionGroup(numPartitions)
+		cache = input.cache()
+		logger.info("Reduce: creating " + str(numPartitions) + " new partitions with salted key hashing")
+
+		writers = [part.writeIterator() for part in output]
+		hasher = self.shuffleHash()
+		turns = dict()
+		for i in range(len(input)):
+			part = input[i]
+			for elem in part:
+				key = elem[0]
+				salts = heavy.get(key)
+				if salts is None:
+					writers[hasher(key) % numPartitions].write(elem)
+				elif replicate:
+					for salt in range(salts):
+						writers[(hasher(key) + salt) % numPartitions].write(elem)
+				else:
+					salt = turns.get(key, 0)
+					turns[key] = (salt + 1) % salts
+					writers[(hasher(key) + salt) % numPartitions].write(elem)
+			if not cache:
+				part.clear()
+			input[i] = None
+
+		self._executor_data.setPartitions(output)
+
+	def __broadcastJoin(self, input1, input2, smallFirst, numPartitions):
+		# The small side is replicated on every executor, the large side is probed without any shuffle
+		small, large = (input1, input2) if smallFirst else (input2, input1)
+		logger.info("Reduce: broadcasting " + ("first" if smallFirst else "second") + " partitions")
+		table = self._executor_data.getPartitionTools().newMemoryPartition()
+		for part in small:
+			part.copyTo(table)
+		self._executor_data.mpi().gather(table, 0)
+		self._executor_data.mpi().bcast(table, 0)
+
+		acum = dict()
+		for key, value in table:
+			if key in acum:
+				acum[key].append(value)
+			else:
+				acum[key] = [value]
+		table.clear()
+
+		logger.info("Reduce: joining key elements with broadcast table of " + str(len(acum)) + " keys")
+		# Same output partitions as the shuffle joins
+		output = self._executor_data.getPartitionTools().newPartitionGroup(numPartitions)
+		writers = [part.writeIterator() for part in output]
+		for p in range(len(large)):
+			writer = writers[p % len(writers)]
+			for key, value in large[p]:
+				if key in acum:
+					if smallFirst:
+						for value1 in acum[key]:
+							writer.write((key, (value1, value)))
+					else:
+						for value2 in acum[key]:
+							writer.write((key, (value, value2)))
+
+		if len(output) == len(large):
+			output.setPartitioner(large.partitioner())
+		self._executor_data.setPartitions(output)
+
 	def distinct(self, numPartitions):
 		input = self._executor_data.getAndDeletePartitions()
 		logger.info("Reduce: distinct" + str(len(input)) + " partitions")
@@ -205,10 +485,19 @@ class IReduceImpl(IBaseImpl):
 		logger.info("Reduce: creating" + str(numPartitions) + " new partitions with hashing")
 
 		writers = [part.writeIterator() for part in tmp]
+		hasher = self.shuffleHash()
+		hasherArray = self.shuffleHashArray()
 
 		for i in range(len(input)):
-			for elem in input[i]:
-				writers[hash(elem) % numPartitions].write(elem)
+			part = input[i]
+			if hasherArray is not None and self._executor_data.getPartitionTools().isMemory(part) and \
+					type(part._inner()).__name__ == 'INumpyWrapper':
+				targets = (hasherArray(part._inner().usedArray()) % numPartitions).tolist()
+				for elem, target in zip(part, targets):
+					writers[target].write(elem)
+			else:
+				for elem in part:
+					writers[hasher(elem) % numPartitions].write(elem)
 		del input
 
 		output = self._executor_data.getPartitionTools().newPartitionGroup()
@@ -219,47 +508,48 @@ class IReduceImpl(IBaseImpl):
 		self._executor_data.setPartitions(output)
 
 	def groupByKey(self, numPartitions):
-		self.__keyHashing(numPartitions)
-		self.__exchanging()
+		self.__keyPartitioning(numPartitions)
 
 		input = self._executor_data.getAndDeletePartitions()
 		output = self._executor_data.getPartitionTools().newPartitionGroup(numPartitions)
 		logger.info("Reduce: reducing key elements")
 
-		acum = dict()
+		def merge(acum, value):
+			acum.append(value)
+			return acum
+
 		for p in range(len(input)):
-			for key, value in input[p]:
-				if key in acum:
-					acum[key].append(value)
-				else:
-					acum[key] = [value]
+			self.__hashAggregate([input[p]], lambda value: [value], merge, output[p].writeIterator())
 			input[p] = None
-			writer = output[p].writeIterator()
-			for item in acum.items():
-				writer.write(item)
-			acum.clear()
 
+		output.setPartitioner(input.partitioner())
 		self._executor_data.setPartitions(output)
 
 	def reduceByKey(self, f, numPartitions, localReduce):
 		context = self._executor_data.getContext()
 		f.before(context)
-		if localReduce:
-			logger.info("Reduce: local reducing key elements")
-			self.__localReduceByKey(f)
-		self.__keyHashing(numPartitions)
-		self.__exchanging()
-		logger.info("Reduce: reducing key elements")
+		if isinstance(f, IReduceOperation):
+			# Built-in operations always combine locally, only partial results are exchanged
+			logger.info("Reduce: local reducing key elements with " + type(f).__name__)
+			self.__operationByKey(f, False)
+			self.__keyPartitioning(numPartitions)
+			logger.info("Reduce: reducing key elements with " + type(f).__name__)
+			self.__operationByKey(f, True)
+		else:
+			if localReduce:
+				logger.info("Reduce: local reducing key elements")
+				self.__localReduceByKey(f)
+			self.__keyPartitioning(numPartitions)
+			logger.info("Reduce: reducing key elements")
 
-		self.__localReduceByKey(f)
+			self.__localReduceByKey(f)
 		f.after(context)
 
 	def aggregateByKey(self, f, numPartitions, hashing):
 		context = self._executor_data.getContext()
 		f.before(context)
 		if hashing:
-			self.__keyHashing(numPartitions)
-			self.__exchanging()
+			self.__keyPartitioning(numPartitions)
 		logger.info("Reduce: aggregating key elements")
 
 		self.__localAggregateByKey(f)
@@ -272,16 +562,39 @@ class IReduceImpl(IBaseImpl):
 		if localFold:
 			logger.info("Reduce: local folding key elements")
 			self.__localAggregateByKey(f)
-			self.__keyHashing(numPartitions)
-			self.__exchanging()
+			self.__keyPartitioning(numPartitions)
 			logger.info("Reduce: folding key elements")
 			self.__localReduceByKey(f)
 		else:
-			self.__keyHashing(numPartitions)
-			self.__exchanging()
+			self.__keyPartitioning(numPartitions)
 			logger.info("Reduce: folding key elements")
 			self.__localAggregateByKey(f)
 
+	def combineByKey(self, createCombiner, mergeValue, mergeCombiners, numPartitions, localCombine):
+		context = self._executor_data.getContext()
+		createCombiner.before(context)
+		mergeValue.before(context)
+		mergeCombiners.before(context)
+
+		if localCombine:
+			logger.info("Reduce: local combining key elements")
+			self.__localCombineByKey(createCombiner, mergeValue)
+			self.__keyPartitioning(numPartitions)
+			logger.info("Reduce: merging key combiners")
+			self.__localReduceByKey(mergeCombiners)
+		else:
+			self.__keyPartitioning(numPartitions)
+			logger.info("Reduce: combining key elements")
+			self.__localCombineByKey(createCombiner, mergeValue)
+
+		createCombiner.after(context)
+		mergeValue.after(context)
+		mergeCombiners.after(context)
+
+	def __checkOperation(self, f):
+		if isinstance(f, IReduceOperation) and f.keyOnly():
+			raise TypeError(type(f).__name__ + " is only available as a key reduction")
+
 	def __reducePartition(self, f, part):
 		context = self._executor_data.getContext()
 		reader = part.readIterator()
@@ -292,50 +605,111 @@ class IReduceImpl(IBaseImpl):
 
 	def __finalReduce(self, f, partial):
 		output = self._executor_data.getPartitionTools().newPartitionGroup()
-		# logger.info("Reduce: reducing all elements in the executor")
-		# Python is single core, len(partial) is always 1
-		logger.info("Reduce: gathering elements for an executor")
-		self._executor_data.mpi().gather(partial, 0)
-		if self._executor_data.mpi().isRoot(0) and len(partial) > 0:
+		# Python is single core, len(partial) is always 0 or 1
+		found = len(partial) > 0
+		value = partial[0] if found else None
+		result = None
+		if isinstance(f, IReduceOperation) and f.ufunc() in self.__NATIVE_OPS:
+			result = self.__numericReduce(f.ufunc(), found, value)
+		if result is None:
+			logger.info("Reduce: reducing elements with a native MPI operation")
+			op = MPI.Op.Create(self.__combiner(f), commute=False)
+			try:
+				result = self._executor_data.mpi().native().reduce((found, value), op=op, root=0)
+			finally:
+				op.Free()
+
+		if self._executor_data.mpi().isRoot(0) and result[0]:
 			logger.info("Reduce: final reduce")
-			result = self._executor_data.getPartitionTools().newMemoryPartition(1)
-			result.writeIterator().write(self.__reducePartition(f, partial))
-			output.add(result)
+			part = self._executor_data.getPartitionTools().newMemoryPartition(1)
+			part.writeIterator().write(result[1])
+			output.add(part)
 		self._executor_data.setPartitions(output)
 
 	def __finalTreeReduce(self, f, partial):
-		executors = self._executor_data.mpi().executors()
-		rank = self._executor_data.mpi().rank()
-		context = self._executor_data.getContext()
 		output = self._executor_data.getPartitionTools().newPartitionGroup()
-		# logger.info("Reduce: reducing all elements in the executor")
-		# Python is single core, len(partial) is always 1
+		# Python is single core, len(partial) is always 0 or 1
+		acum = (len(partial) > 0, partial[0] if len(partial) > 0 else None)
 
 		logger.info("Reduce: performing a final tree reduce")
-		distance = 1
-		order = 1
-		while order < executors:
-			order *= 2
-			if rank % order == 0:
-				other = rank + distance
-				distance = order
-				if other >= executors:
-					continue
-				self._executor_data.mpi().recv(partial, other, 0)
-				result = f.call(partial[0], partial[1], context)
-				partial.clear()
-				partial.writeIterator().write(result)
-			else:
-				other = rank - distance
-				self._executor_data.mpi().send(partial, other, 0)
-				break
+		acum = self.treeMerge(acum, self.__combiner(f))
 
-		if self._executor_data.mpi().isRoot(0) and len(partial) > 0:
+		if self._executor_data.mpi().isRoot(0) and acum[0]:
 			result = self._executor_data.getPartitionTools().newMemoryPartition(1)
-			result.writeIterator().write(partial[0])
+			result.writeIterator().write(acum[1])
 			output.add(result)
 		self._executor_data.setPartitions(output)
 
+	def __combiner(self, f):
+		# Partial results are (found, value) so executors without elements are skipped
+		context = self._executor_data.getContext()
+
+		def combine(a, b, datatype=None):
+			if not a[0]:
+				return b
+			if not b[0]:
+				return a
+			return True, f.call(a[1], b[1], context)
+
+		return combine
+
+	def __numericReduce(self, ufunc, found, value):
+		try:
+			import numpy
+		except ImportError:
+			return None
+		meta = None
+		if found:
+			array = numpy.asarray(value)
+			if array.dtype.kind in "iuf":
+				# Largest magnitude, integer sums must not wrap around
+				bound = float(numpy.abs(array.astype(numpy.float64)).max()) if array.size > 0 else 0.0
+				meta = (array.dtype, array.shape, bound)
+			else:
+				meta = False
+		meta = [m for m in self._executor_data.mpi().native().allgather(meta) if m is not None]
+		# Every executor takes the same decision
+		if not meta or False in meta or len(set(shape for _, shape, _ in meta)) > 1:
+			return None
+		dtype = numpy.result_type(*[dtype for dtype, _, _ in meta])
+		shape = meta[0][1]
+		if all(m[0].kind in "iu" for m in meta):
+			# Signed and unsigned integers are promoted to float, and sums must fit in 64 bits
+			if dtype.kind == "f" or ufunc == "add" and sum(bound for _, _, bound in meta) >= 2 ** 62:
+				return None
+		logger.info("Reduce: reducing numeric elements with MPI " + ufunc)
+		op = self.__NATIVE_OPS[ufunc]
+
+		if found:
+			buffer = numpy.array(value, dtype=dtype).reshape(shape)
+		else:
+			info = numpy.finfo(dtype) if dtype.kind == "f" else numpy.iinfo(dtype)
+			if op == MPI.SUM:
+				identity = 0
+			elif op == MPI.MIN:
+				identity = numpy.inf if dtype.kind == "f" else info.max
+			else:
+				identity = -numpy.inf if dtype.kind == "f" else info.min
+			buffer = numpy.full(shape, identity, dtype=dtype)
+		result = numpy.empty_like(buffer) if self._executor_data.mpi().isRoot(0) else None
+		self._executor_data.mpi().native().Reduce(buffer, result, op=op, root=0)
+		if result is None:
+			return False, None
+		return True, result.item() if shape == () else result
+
+	def __localFold(self, f):
+		# Partitions are reduced in parallel and the zero value is applied once per executor, fold functions
+		# must be associative like in the final reduce
+		context = self._executor_data.getContext()
+		partial = self._executor_data.getPartitionTools().newMemoryPartition(1)
+		self.__basicReduce(f, partial)
+		acum = self._executor_data.getVariable("zero")
+		if len(partial) > 0:
+			acum = f.call(acum, partial.readIterator().next(), context)
+		result = self._executor_data.getPartitionTools().newMemoryPartition(1)
+		result.writeIterator().write(acum)
+		return result
+
 	def __aggregatePartition(self, f, part, acum):
 		context = self._executor_data.getContext()
 		for item in part:
@@ -346,19 +720,12 @@ class IReduceImpl(IBaseImpl):
 		input = self._executor_data.getPartitions()
 		output = self._executor_data.getPartitionTools().newPartitionGroup()
 		context = self._executor_data.getContext()
-		acum = dict()
-		for p in range(len(input)):
-			for key, value in input[p]:
-				if key in acum:
-					acum[key] = f.call(acum[key], value, context)
-				else:
-					acum[key] = value
 
-		output.add(self._executor_data.getPartitionTools().newMemoryPartition())
-		writer = output[0].writeIterator()
-		for item in acum.items():
-			writer.write(item)
+		output.add(self.__newAggregatePartition())
+		self.__hashAggregate(input, lambda value: value, lambda acum, value: f.call(acum, value, context),
+		                     output[0].writeIterator())
 
+		output.setPartitioner(input.partitioner())
 		self._executor_data.setPartitions(output)
 
 	def __localAggregateByKey(self, f):
@@ -367,21 +734,143 @@ class IReduceImpl(IBaseImpl):
 		context = self._executor_data.getContext()
 		base_acum = self._executor_data.getVariable("zero")
 
+		output.add(self.__newAggregatePartition())
+		self.__hashAggregate(input, lambda value: f.call(base_acum, value, context),
+		                     lambda acum, value: f.call(acum, value, context), output[0].writeIterator())
+
+		output.setPartitioner(input.partitioner())
+		self._executor_data.setPartitions(output)
+
+	def __localCombineByKey(self, createCombiner, mergeValue):
+		input = self._executor_data.getAndDeletePartitions()
+		output = self._executor_data.getPartitionTools().newPartitionGroup()
+		context = self._executor_data.getContext()
+
+		output.add(self.__newAggregatePartition())
+		self.__hashAggregate(input, lambda value: createCombiner.call(value, context),
+		                     lambda acum, value: mergeValue.call(acum, value, context), output[0].writeIterator())
+
+		output.setPartitioner(input.partitioner())
+		self._executor_data.setPartitions(output)
+
+	def __operationByKey(self, op, final):
+		input = self._executor_data.getPartitions()
+		output = self._executor_data.getPartitionTools().newPartitionGroup()
+		output.add(self.__newAggregatePartition())
+		writer = output[0].writeIterator()
+
+		columns = self.__pairColumns(input, final)
+		if columns is not None:
+			import numpy
+			keys, values = columns
+			keys, first, inverse = numpy.unique(keys, return_index=True, return_inverse=True)
+			values = op.reduceColumns(values if final else op.columns(values), inverse, first)
+			if final:
+				for item in zip(keys.tolist(), op.finishColumns(values).tolist()):
+					writer.write(item)
+			else:
+				for key, *partial in zip(keys.tolist(), *[column.tolist() for column in values]):
+					writer.write((key, tuple(partial)))
+		else:
+			create = (lambda partial: partial) if final else op.create
+			self.__hashAggregate(input, create, lambda acum, value: op.combine(acum, create(value)), writer,
+			                     finish=op.finish if final else None)
+
+		output.setPartitioner(input.partitioner())
+		self._executor_data.setPartitions(output)
+
+	def __pairColumns(self, input, partials):
+		# Integer keys with numeric values (or partials) are reduced as NumPy columns when there is no memory
+		# budget, the columns must fit in memory
+		if self._executor_data.getProperties().reduceMemory() is not None:
+			return None
+		first = next((elem for part in input for elem in part), None)
+		if not isinstance(first, tuple) or len(first) != 2 or not self.__isNumber(first[0], int):
+			return None
+		if not all(self.__isNumber(value, (int, float)) for value in (first[1] if partials else (first[1],))):
+			return None
+		try:
+			import numpy
+		except ImportError:
+			return None
+		# Keys and values are extracted and converted by map, itemgetter and numpy without a python loop
+		keys = list()
+		values = list()
+		for part in input:
+			elems = part._inner() if self._executor_data.getPartitionTools().isMemory(part) else None
+			if not isinstance(elems, list):
+				elems = list(part)
+			if len(elems) == 0:
+				continue
+			try:
+				keys.append(numpy.array(list(map(itemgetter(0), elems))))
+				if partials:
+					# Each position of the partial results is a column with its own type
+					values.append([numpy.array(column) for column in zip(*map(itemgetter(1), elems))])
+				else:
+					values.append(numpy.array(list(map(itemgetter(1), elems))))
+			except (ValueError, TypeError, IndexError):
+				return None
+		keys = numpy.concatenate(keys)
+		if keys.dtype.kind not in "iu" or keys.ndim != 1:
+			return None
+		if partials:
+			if len(set(map(len, values))) != 1:
+				return None
+			values = [numpy.concatenate(column) for column in zip(*values)]
+		else:
+			values = numpy.concatenate(values)
+		for column in (values if partials else [values]):
+			if column.dtype.kind not in "iuf" or column.ndim != 1:
+				return None
+			# Integer sums must not wrap around
+			if column.dtype.kind != "f" and numpy.abs(column.astype(numpy.float64)).sum() >= 2 ** 62:
+				return None
+		return keys, values
+
+	def __isNumber(self, value, types):
+		return isinstance(value, types) and not isinstance(value, bool)
+
+	def __newAggregatePartition(self):
+		if self._executor_data.getProperties().reduceMemory() is None:
+			return self._executor_data.getPartitionTools().newMemoryPartition()
+		return self._executor_data.getPartitionTools().newPartition()
+
+	def __hashAggregate(self, input, create, merge, writer, depth=0, finish=None):
+		budget = self._executor_data.getProperties().reduceMemory()
+		limit = None
+		sample = list()
 		acum = dict()
+		buckets = None
 		for p in range(len(input)):
 			for key, value in input[p]:
 				if key in acum:
-					acum[key] = f.call(acum[key], value, context)
+					acum[key] = merge(acum[key], value)
+				elif limit is None or len(acum) < limit:
+					acum[key] = create(value)
+					if budget is not None and len(sample) < 32:
+						# The tuple header stands in for the dict entry overhead
+						sample.append((key, acum[key]))
+						limit = max(1, int(budget / self.elementBytes(sample)))
 				else:
-					acum[key] = f.call(base_acum, value, context)
-			input[p] = None
-
-		output.add(self._executor_data.getPartitionTools().newMemoryPartition())
-		writer = output[0].writeIterator()
-		for item in acum.items():
-			writer.write(item)
+					# Keys that do not fit are spilled with their raw values and aggregated later
+					if buckets is None:
+						logger.info("Reduce: memory budget exceeded with " + str(limit) + " keys, spilling to disk")
+						buckets = [self._executor_data.getPartitionTools().newDiskPartition() for _ in range(8)]
+						bucket_writers = [bucket.writeIterator() for bucket in buckets]
+					bucket_writers[hash((depth, key)) % len(buckets)].write((key, value))
+
+		if finish is None:
+			for item in acum.items():
+				writer.write(item)
+		else:
+			for key, value in acum.items():
+				writer.write((key, finish(value)))
+		acum.clear()
 
-		self._executor_data.setPartitions(output)
+		if buckets is not None:
+			for bucket in buckets:
+				self.__hashAggregate([bucket], create, merge, writer, depth + 1, finish)
 
 	def __distinctFilter(self, parts):
 		distinct = set()
@@ -395,24 +884,58 @@ class IReduceImpl(IBaseImpl):
 			parts[i] = new_part
 			distinct.clear()
 
+	def __keyPartitioning(self, numPartitions):
+		partitioner = ("hash", numPartitions)
+		if self._executor_data.getPartitions().partitioner() == partitioner:
+			self.__keyHashing(numPartitions)
+			if self.__ownedPartitions():
+				# Every key is already in the executor that owns its partition, only a local split was needed
+				logger.info("Reduce: partitions already hashed by key, skipping exchange")
+			else:
+				logger.info("Reduce: partitioner is outdated, exchanging partitions")
+				self.__exchanging()
+		else:
+			self.__keyHashing(numPartitions)
+			self.__exchanging()
+		self._executor_data.getPartitions().setPartitioner(partitioner)
+
 	def __keyHashing(self, numPartitions):
 		input = self._executor_data.getAndDeletePartitions()
 		output = self._executor_data.getPartitionTools().newPartitionGroup(numPartitions)
 		cache = input.cache()
-		logger.info("Reduce: creating " + str(len(input)) + " new partitions with key hashing")
+		logger.info("Reduce: creating " + str(numPartitions) + " new partitions with key hashing")
 
 		writers = [part.writeIterator() for part in output]
-		n = len(writers)
+		hasher = self.shuffleHash()
 		for i in range(len(input)):
 			part = input[i]
 			for elem in part:
-				writers[hash(elem[0]) % n].write(elem)
+				writers[hasher(elem[0]) % numPartitions].write(elem)
 			if not cache:
 				part.clear()
 			input[i] = None
 
 		self._executor_data.setPartitions(output)
 
+	def __ownedPartitions(self):
+		# Keeps only the partitions of this executor in the exchange block distribution if every executor
+		# has no elements outside its own block, otherwise partitions are left untouched
+		input = self._executor_data.getPartitions()
+		executors = self._executor_data.mpi().executors()
+		rank = self._executor_data.mpi().rank()
+		block = int(len(input) / executors)
+		remainder = len(input) % executors
+		first = block * rank + min(rank, remainder)
+		last = first + block + (1 if rank < remainder else 0)
+		owned = all(len(input[i]) == 0 for i in range(len(input)) if i < first or i >= last)
+		if not self._executor_data.mpi().native().allreduce(owned, MPI.LAND):
+			return False
+		output = self._executor_data.getPartitionTools().newPartitionGroup()
+		for i in range(first, last):
+			output.add(input[i])
+		self._executor_data.setPartitions(output)
+		return True
+
 	def __exchanging(self):
 		input = self._executor_data.getPartitions()
 		output = self._executor_data.getPartitionTools().newPartitionGroup()
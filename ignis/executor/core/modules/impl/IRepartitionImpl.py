@@ -231,7 +231,8 @@ class IRepartitionImpl(IBaseImpl):
 		self.__partitionBy_impl(lambda elem, ctx: r.randint(0, numPartitions), numPartitions)
 
 	def partitionByHash(self, numPartitions):
-		self.__partitionBy_impl(lambda elem, ctx: hash(elem), numPartitions)
+		hasher = self.shuffleHash()
+		self.__partitionBy_impl(lambda elem, ctx: hasher(elem), numPartitions, self.shuffleHashArray())
 
 	def partitionBy(self, f, numPartitions):
 		context = self._executor_data.getContext()
@@ -240,7 +241,7 @@ class IRepartitionImpl(IBaseImpl):
 		self.__partitionBy_impl(call, numPartitions)
 		f.after(context)
 
-	def __partitionBy_impl(self, f, numPartitions):
+	def __partitionBy_impl(self, f, numPartitions, vectorized=None):
 		input = self._executor_data.getAndDeletePartitions()
 		output = self._executor_data.getPartitionTools().newPartitionGroup()
 		context = self._executor_data.getContext()
@@ -249,6 +250,13 @@ class IRepartitionImpl(IBaseImpl):
 		global_group = self._executor_data.getPartitionTools().newPartitionGroup(numPartitions)
 		writers = [part.writeIterator() for part in global_group]
 		for p in range(len(input)):
+			if vectorized is not None and self._executor_data.getPartitionTools().isMemory(input[p]) and \
+					type(input[p]._inner()).__name__ == 'INumpyWrapper':
+				targets = (vectorized(input[p]._inner().usedArray()) % numPartitions).tolist()
+				for elem, target in zip(input[p], targets):
+					writers[target].write(elem)
+				input[p] = None
+				continue
 			reader = input[p].readIterator()
 			for i in range(len(input[p])):
 				elem = reader.next()
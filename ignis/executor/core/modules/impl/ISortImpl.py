@@ -1,6 +1,11 @@
+import heapq
 import logging
 import math
+from collections import Counter
+from itertools import islice
+from operator import itemgetter
 
+from ignis.executor.api.function.IFunction import IFunction
 from ignis.executor.core.IMpi import MPI
 from ignis.executor.core.modules.impl.IBaseImpl import IBaseImpl
 
@@ -31,9 +36,18 @@ class ISortImpl(IBaseImpl):
     def sortBy(self, f, ascending, numPartitions=-1):
         context = self._executor_data.getContext()
         f.before(context)
-        self.__sortImpl(lambda a, b: f.call(a, b, context), ascending, numPartitions)
+        if self.__isKeyFunction(f):
+            self.__sortImpl(None, ascending, numPartitions, key=lambda a: f.call(a, context))
+        else:
+            self.__sortImpl(lambda a, b: f.call(a, b, context), ascending, numPartitions)
         f.after(context)
 
+    def sortWithinPartitions(self, ascending):
+        self.__sortWithinPartitionsImpl(ascending)
+
+    def sortByKeyWithinPartitions(self, ascending):
+        self.__sortWithinPartitionsImpl(ascending, key=itemgetter(0))
+
     def top(self, num, cmp=None):
         if cmp is None:
             self.__take_ordered_impl(comparator=None, ascending=False, n=num)
@@ -53,12 +67,15 @@ class ISortImpl(IBaseImpl):
             cmp.after(context)
 
     def sortByKey(self, ascending, numPartitions=-1):
-        self.__sortImpl(lambda a, b: a[0] < b[0], ascending, numPartitions)
+        self.__sortImpl(None, ascending, numPartitions, key=itemgetter(0))
 
     def sortByKeyBy(self, f, ascending, numPartitions=-1):
         context = self._executor_data.getContext()
         f.before(context)
-        self.__sortImpl(lambda a, b: f.call(a[0], b[0], context), ascending, numPartitions)
+        if self.__isKeyFunction(f):
+            self.__sortImpl(None, ascending, numPartitions, key=lambda a: f.call(a[0], context))
+        else:
+            self.__sortImpl(lambda a, b: f.call(a[0], b[0], context), ascending, numPartitions)
         f.after(context)
 
     def max(self, cmp=None):
@@ -79,7 +96,23 @@ class ISortImpl(IBaseImpl):
             self.__max_impl(comparator=lambda a, b: cmp.call(a, b, context), ascending=True)
             cmp.after(context)
 
-    def __sortImpl(self, cmp, ascending, partitions, local_sort=True):
+    def __isKeyFunction(self, f):
+        if hasattr(f, "arity"):
+            return f.arity() == 1
+        return isinstance(f, IFunction)
+
+    def __sortWithinPartitionsImpl(self, ascending, key=None):
+        input = self._executor_data.getPartitions()
+        if input.cache():
+            if self._executor_data.getPartitionTools().isMemory(input):
+                input = input.clone()
+            else:
+                input = input.shadowCopy()
+        logger.info("Sort: sorting " + str(len(input)) + " partitions locally")
+        self.__localSort(input, None, ascending, key)
+        self._executor_data.setPartitions(input)
+
+    def __sortImpl(self, cmp, ascending, partitions, local_sort=True, key=None):
         input = self._executor_data.getPartitions()
         executors = self._executor_data.mpi().executors()
         # Copy the data if they are reused
@@ -92,7 +125,7 @@ class ISortImpl(IBaseImpl):
         # Sort each partition
         if local_sort:
             logger.info("Sort: sorting " + str(len(input)) + " partitions locally")
-            self.__localSort(input, cmp, ascending)
+            self.__localSort(input, cmp, ascending, key)
 
         localPartitions = input.partitions()
         totalPartitions = self._executor_data.mpi().native().allreduce(localPartitions, MPI.SUM)
@@ -114,6 +147,12 @@ class ISortImpl(IBaseImpl):
         samples = max(partitions, samples)
         logger.info("Sort: selecting " + str(samples) + " pivots")
         pivots = self.__selectPivots(input, samples)
+        if key is not None:
+            # Pivots are compared by key, so only keys are exchanged and sorted
+            pivots = self.__keyPivots(pivots, key)
+            pivots_cmp = None
+        else:
+            pivots_cmp = cmp
 
         resampling = self._executor_data.getProperties().sortResampling()
         if sr < 1 and resampling and executors > 1 and local_sort:
@@ -121,7 +160,7 @@ class ISortImpl(IBaseImpl):
             tmp = self._executor_data.getPartitionTools().newPartitionGroup(0)
             tmp.add(pivots)
             self._executor_data.setPartitions(tmp)
-            self.__sortImpl(cmp, ascending, partitions, False)
+            self.__sortImpl(pivots_cmp, ascending, partitions, False)
             logger.info("Sort: -- resampling pivots end --")
 
             samples = partitions - 1
@@ -137,7 +176,7 @@ class ISortImpl(IBaseImpl):
             if self._executor_data.mpi().isRoot(0):
                 group = self._executor_data.getPartitionTools().newPartitionGroup(0)
                 group.add(pivots)
-                self.__localSort(group, cmp, ascending)
+                self.__localSort(group, pivots_cmp, ascending)
                 samples = partitions - 1
 
                 logger.info("Sort: selecting " + str(samples) + " partition pivots")
@@ -146,21 +185,101 @@ class ISortImpl(IBaseImpl):
         logger.info("Sort: broadcasting pivots ranges")
         self._executor_data.mpi().bcast(pivots, 0)
 
-        ranges = self.__generateRanges(input, pivots, cmp, ascending)
+        spread = self.__heavyRanges(pivots, pivots_cmp, ascending)
+        if cmp is None and key is None and local_sort and self.__isNumericNumpy(input):
+            ranges = self.__generateNumpyRanges(input, pivots, ascending, spread)
+        else:
+            ranges = self.__generateRanges(input, pivots, cmp, ascending, key, spread)
         output = self._executor_data.getPartitionTools().newPartitionGroup()
         logger.info("Sort: exchanging ranges")
         self.exchange(ranges, output)
+        self.__sizeReport(output)
 
         # Sort final partitions
-        logger.info("Sort: sorting again " + str(len(output)) + " partitions locally")
-        self.__localSort(output, cmp, ascending)
+        if self._executor_data.getPartitionTools().isMemory(output):
+            logger.info("Sort: merging sorted runs of " + str(len(output)) + " partitions")
+            self.__mergeRuns(output, cmp, ascending, key)
+        else:
+            logger.info("Sort: sorting again " + str(len(output)) + " partitions locally")
+            self.__localSort(output, cmp, ascending, key)
+        # Heavy keys may span several ranges, so it never matches a hash layout
+        output.setPartitioner(("range", partitions))
         self._executor_data.setPartitions(output)
 
-    def __localSort(self, group, cmp, ascending):
+    def __mergeRuns(self, group, cmp, ascending, key):
+        # Received partitions are concatenations of ranges sorted by each sender
+        for part in group:
+            elems = part._IMemoryPartition__elements
+            if type(elems).__name__ == 'INumpyWrapper' and cmp is None and key is None:
+                import numpy
+                array = elems.usedArray()
+                if array.dtype.kind in "fc" and numpy.isnan(array).any():
+                    # NaN breaks the run detection and the merge, they are placed like the local numpy sort
+                    if ascending:
+                        array.sort(kind="stable")
+                    else:
+                        array[::-1].sort(kind="stable")
+                else:
+                    array[:] = self.__mergeNumpyRuns(array, ascending)
+            elif isinstance(elems, list):
+                if cmp is not None:
+                    keys = list(map(cmp_to_key(cmp), elems))
+                elif key is not None:
+                    keys = list(map(key, elems))
+                else:
+                    keys = elems
+                if ascending:
+                    starts = [i for i in range(1, len(keys)) if keys[i] < keys[i - 1]]
+                else:
+                    starts = [i for i in range(1, len(keys)) if keys[i - 1] < keys[i]]
+                if not starts:
+                    continue
+                bounds = [0] + starts + [len(keys)]
+                runs = [range(bounds[r], bounds[r + 1]) for r in range(len(bounds) - 1)]
+                order = heapq.merge(*runs, key=keys.__getitem__, reverse=not ascending)
+                elems[:] = [elems[i] for i in order]
+            else:
+                single = self._executor_data.getPartitionTools().newPartitionGroup()
+                single.add(part)
+                self.__localSort(single, cmp, ascending, key)
+
+    def __mergeNumpyRuns(self, array, ascending):
+        import numpy
+        if ascending:
+            cuts = numpy.flatnonzero(array[1:] < array[:-1]) + 1
+        else:
+            cuts = numpy.flatnonzero(array[1:] > array[:-1]) + 1
+        runs = numpy.split(array, cuts)
+        # Pairwise tree merge, each level is vectorized
+        while len(runs) > 1:
+            merged = list()
+            for i in range(0, len(runs) - 1, 2):
+                a, b = runs[i], runs[i + 1]
+                if ascending:
+                    pos = numpy.searchsorted(a, b, side='right')
+                else:
+                    pos = len(a) - numpy.searchsorted(a[::-1], b, side='left')
+                pos += numpy.arange(len(b))
+                result = numpy.empty(len(a) + len(b), dtype=array.dtype)
+                mask = numpy.ones(len(result), dtype=bool)
+                mask[pos] = False
+                result[pos] = b
+                result[mask] = a
+                merged.append(result)
+            if len(runs) % 2 == 1:
+                merged.append(runs[-1])
+            runs = merged
+        return runs[0]
+
+    def __localSort(self, group, cmp, ascending, key=None):
         inMemory = self._executor_data.getPartitionTools().isMemory(group)
+        budget = self._executor_data.getProperties().sortMemory()
 
         for i in range(0, len(group)):
             part = group[i]
+            if not inMemory and budget is not None and self.partitionBytes(part) > budget:
+                group[i] = self.__externalSort(part, cmp, ascending, key, budget)
+                continue
             if not inMemory:
                 new_part = self._executor_data.getPartitionTools().newMemoryPartition(part.size())
                 part.moveTo(new_part)
@@ -168,17 +287,25 @@ class ISortImpl(IBaseImpl):
 
             elems = part._IMemoryPartition__elements
 
-            if isinstance(elems, bytearray):
+            if key is not None:
+                if isinstance(elems, bytearray):
+                    part._IMemoryPartition__elements = bytearray(sorted(elems, key=key, reverse=not ascending))
+                elif type(elems).__name__ == 'INumpyWrapper':
+                    import numpy
+                    elems.array = numpy.array(sorted(elems.usedArray(), key=key, reverse=not ascending))
+                else:
+                    elems.sort(key=key, reverse=not ascending)
+            elif isinstance(elems, bytearray):
                 if cmp:
                     part._IMemoryPartition__elements = bytearray(
                         sorted(elems, key=cmp_to_key(cmp), reverse=not ascending))
                 else:
-                    part._IMemoryPartition__elements = bytearray(sorted(elems, reverse=not ascending))
+                    part._IMemoryPartition__elements = self.__countingSortBytes(elems, ascending)
             elif type(elems).__name__ == 'INumpyWrapper':
                 if cmp:
                     import numpy
                     elems.array = numpy.array(sorted(elems.usedArray(), key=cmp_to_key(cmp), reverse=not ascending))
-                else:
+                elif not self.__countingSortNumpy(elems.usedArray(), ascending):
                     if ascending:
                         elems.usedArray().sort()
                     else:
@@ -193,6 +320,50 @@ class ISortImpl(IBaseImpl):
                 group[i] = self._executor_data.getPartitionTools().newPartition()
                 part.moveTo(group[i])
 
+    def __countingSortBytes(self, elems, ascending):
+        counts = Counter(elems)
+        return bytearray(b''.join(bytes((v,)) * counts[v] for v in sorted(counts, reverse=not ascending)))
+
+    def __countingSortNumpy(self, array, ascending):
+        # numpy sort is slow for 1-byte dtypes, for wider ones it is already faster (see ISortBenchmark)
+        if array.dtype.kind not in "iu" or array.dtype.itemsize > 1 or len(array) == 0:
+            return False
+        import numpy
+        lo = int(array.min())
+        hi = int(array.max())
+        # Offsets are computed in int64, small dtypes would wrap around
+        counts = numpy.bincount(array.astype(numpy.int64) - lo)
+        values = numpy.arange(lo, hi + 1, dtype=array.dtype)
+        if not ascending:
+            counts = counts[::-1]
+            values = values[::-1]
+        array[:] = numpy.repeat(values, counts)
+        return True
+
+    def __externalSort(self, part, cmp, ascending, key, budget):
+        if cmp is not None:
+            key = cmp_to_key(cmp)
+        run_size = max(1, int(budget * len(part) / max(self.partitionBytes(part), 1)))
+        runs = list()
+        elems = iter(part)
+        while True:
+            run = list(islice(elems, run_size))
+            if not run:
+                break
+            run.sort(key=key, reverse=not ascending)
+            disk_run = self._executor_data.getPartitionTools().newDiskPartition()
+            writer = disk_run.writeIterator()
+            for elem in run:
+                writer.write(elem)
+            runs.append(disk_run)
+
+        logger.info("Sort: merging " + str(len(runs)) + " sorted runs of " + str(run_size) + " elements")
+        output = self._executor_data.getPartitionTools().newPartition(part.type())
+        writer = output.writeIterator()
+        for elem in heapq.merge(*runs, key=key, reverse=not ascending):
+            writer.write(elem)
+        return output
+
     def __selectPivots(self, group, samples):
         pivots = self._executor_data.getPartitionTools().newMemoryPartition()
         inMemory = self._executor_data.getPartitionTools().isMemory(group)
@@ -261,61 +432,185 @@ class ISortImpl(IBaseImpl):
 
         return result
 
-    def __generateRanges(self, input, pivots, cmp, ascending):
+    def __keyPivots(self, pivots, key):
+        keys = self._executor_data.getPartitionTools().newMemoryPartition(len(pivots), list)
+        writer = keys.writeIterator()
+        for elem in pivots:
+            writer.write(key(elem))
+        return keys
+
+    def __isNumericNumpy(self, group):
+        if len(group) == 0 or not self._executor_data.getPartitionTools().isMemory(group):
+            return False
+        for part in group:
+            elems = part._inner()
+            if type(elems).__name__ != 'INumpyWrapper' or elems.array.dtype.kind not in "biuf":
+                return False
+        return True
+
+    def __heavyRanges(self, pivots, cmp, ascending):
         if cmp is None:
             cmp = lambda a, b: a < b
+        # Consecutive equal pivots mark a heavy key, its elements are spread over the ranges around them
+        spread = dict()
+        i = 0
+        while i < len(pivots):
+            j = i
+            while j + 1 < len(pivots) and not cmp(pivots[i], pivots[j + 1]) and not cmp(pivots[j + 1], pivots[i]):
+                j += 1
+            if j > i:
+                targets = list(range(i, j + 2))
+                spread[j + 1 if ascending else i] = (pivots[i], targets)
+                logger.info("Sort: heavy key " + str(pivots[i]) + " spread over " + str(len(targets)) + " partitions")
+            i = j + 1
+        return spread
+
+    def __spreadChunks(self, start, end, targets, offset):
+        n = len(targets)
+        size = end - start
+        return [(targets[(t + offset) % n], start + int(size * t / n), start + int(size * (t + 1) / n))
+                for t in range(n)]
+
+    def __generateNumpyRanges(self, input, pivots, ascending, spread):
+        import numpy
+        pivots = numpy.asarray(list(pivots))
+        offset = self._executor_data.mpi().rank() * len(input)
+        # Each sorted partition is split at the pivots with a single searchsorted
+        pieces = [list() for r in range(len(pivots) + 1)]
+        for p in range(len(input)):
+            array = input[p]._inner().usedArray()
+            if ascending:
+                bounds = numpy.searchsorted(array, pivots, side='left')
+            else:
+                bounds = len(array) - numpy.searchsorted(array[::-1], pivots, side='left')
+            bounds = [0] + bounds.tolist() + [len(array)]
+            for r in range(len(bounds) - 1):
+                if r not in spread:
+                    pieces[r].append(array[bounds[r]:bounds[r + 1]])
+                    continue
+                value, targets = spread[r]
+                if ascending:
+                    middle = min(max(int(numpy.searchsorted(array, value, side='right')), bounds[r]), bounds[r + 1])
+                    equal = (bounds[r], middle)
+                    rest = (middle, bounds[r + 1])
+                else:
+                    middle = len(array) - int(numpy.searchsorted(array[::-1], value, side='right'))
+                    middle = min(max(middle, bounds[r]), bounds[r + 1])
+                    rest = (bounds[r], middle)
+                    equal = (middle, bounds[r + 1])
+                if not ascending:
+                    pieces[r].append(array[rest[0]:rest[1]])
+                for target, a, b in self.__spreadChunks(equal[0], equal[1], targets, offset + p):
+                    pieces[target].append(array[a:b])
+                if ascending:
+                    pieces[r].append(array[rest[0]:rest[1]])
+            input[p] = None
+        input.clear()
+
+        ranges = self._executor_data.getPartitionTools().newPartitionGroup()
+        for r in range(len(pivots) + 1):
+            if len(pieces[r]) == 1:
+                array = pieces[r][0]  # zero-copy view of the local partition
+            else:
+                array = numpy.concatenate(pieces[r])
+            part = self._executor_data.getPartitionTools().newNumpyMemoryPartition(array.dtype, 0)
+            part._IMemoryPartition__elements = part._IMemoryPartition__cls(array)
+            ranges.add(part)
+        return ranges
+
+    def __generateRanges(self, input, pivots, cmp, ascending, key=None, spread=None):
+        if cmp is None:
+            cmp = lambda a, b: a < b
+        if spread is None:
+            spread = dict()
         if self._executor_data.getPartitionTools().isMemory(input):
-            return self.__generateMemoryRanges(input, pivots, cmp, ascending)
+            return self.__generateMemoryRanges(input, pivots, cmp, ascending, key, spread)
         ranges = self._executor_data.getPartitionTools().newPartitionGroup(len(pivots) + 1)
         writers = [p.writeIterator() for p in ranges]
+        turn = self._executor_data.mpi().rank()
 
         for p in range(len(input)):
             for elem in input[p]:
-                writers[self.__searchRange(elem, pivots, cmp, ascending)].write(elem)
+                r = self.__searchRange(elem, pivots, cmp, ascending, key)
+                if r in spread:
+                    value, targets = spread[r]
+                    if not cmp(value, elem if key is None else key(elem)):
+                        r = targets[turn % len(targets)]
+                        turn += 1
+                writers[r].write(elem)
             input[p] = None
 
         input.clear()
         return ranges
 
-    def __generateMemoryRanges(self, input, pivots, cmp, ascending):
+    def __generateMemoryRanges(self, input, pivots, cmp, ascending, key, spread):
         ranges = self._executor_data.getPartitionTools().newPartitionGroup(len(pivots) + 1)
         writers = [p.writeIterator() for p in ranges]
+        offset = self._executor_data.mpi().rank() * len(input)
 
         for p in range(len(input)):
             part = input[p]
-            elems_stack = list()
-            ranges_stack = list()
-
-            elems_stack.append((0, len(part) - 1))
-            ranges_stack.append((0, len(pivots)))
-
-            while len(elems_stack) > 0:
-                (start, end) = elems_stack.pop()
-                mid = int((start + end) / 2)
-
-                (first, last) = ranges_stack.pop()
-
-                r = self.__searchRange(part[mid], pivots, cmp, ascending)
-                writers[r].write(part[mid])
-
-                if first == r:
-                    for i in range(start, mid):
-                        writers[r].write(part[i])
-                elif start < mid:
-                    elems_stack.append((start, mid - 1))
-                    ranges_stack.append((first, r))
-
-                if r == last:
-                    for i in range(mid + 1, end + 1):
+            start = 0
+            # Partition is sorted, each range is a contiguous block that keeps the order
+            for r in range(len(pivots) + 1):
+                if start == len(part):
+                    break
+                end = len(part)
+                if r < len(pivots):
+                    first = start
+                    while first < end:
+                        mid = int((first + end) / 2)
+                        if self.__searchRange(part[mid], pivots, cmp, ascending, key) > r:
+                            end = mid
+                        else:
+                            first = mid + 1
+                if r in spread:
+                    self.__spreadMemoryRange(part, start, end, writers, r, spread[r], cmp, ascending, key, offset + p)
+                else:
+                    for i in range(start, end):
                         writers[r].write(part[i])
-                elif mid < end:
-                    elems_stack.append((mid + 1, end))
-                    ranges_stack.append((r, last))
+                start = end
 
             input[p] = None
         return ranges
 
-    def __searchRange(self, elem, pivots, cmp, ascending):
+    def __spreadMemoryRange(self, part, start, end, writers, r, heavy, cmp, ascending, key, offset):
+        value, targets = heavy
+        # Elements equal to the heavy key are the first (ascending) or the last (descending) of the range
+        first = start
+        last = end
+        while first < last:
+            mid = int((first + last) / 2)
+            if cmp(value, part[mid] if key is None else key(part[mid])) == ascending:
+                last = mid
+            else:
+                first = mid + 1
+        if ascending:
+            equal = (start, first)
+            rest = (first, end)
+        else:
+            rest = (start, first)
+            equal = (first, end)
+            for i in range(rest[0], rest[1]):
+                writers[r].write(part[i])
+        for target, a, b in self.__spreadChunks(equal[0], equal[1], targets, offset):
+            for i in range(a, b):
+                writers[target].write(part[i])
+        if ascending:
+            for i in range(rest[0], rest[1]):
+                writers[r].write(part[i])
+
+    def __sizeReport(self, group):
+        sizes = self._executor_data.mpi().native().gather([len(part) for part in group], 0)
+        if self._executor_data.mpi().isRoot(0):
+            sizes = [sz for executor in sizes for sz in executor]
+            if sizes and sum(sizes) > 0:
+                logger.info("Sort: partition sizes " + str(sizes) + ", max/avg " +
+                            str(round(max(sizes) * len(sizes) / sum(sizes), 2)))
+
+    def __searchRange(self, elem, pivots, cmp, ascending, key=None):
+        if key is not None:
+            elem = key(elem)
         start = 0
         end = len(pivots) - 1
         while start < end:
@@ -332,43 +627,47 @@ class ISortImpl(IBaseImpl):
     def __take_ordered_impl(self, comparator, ascending, n):
         input = self._executor_data.getPartitions()
         output = self._executor_data.getPartitionTools().newPartitionGroup()
+        key = cmp_to_key(comparator) if comparator is not None else None
 
         logger.info("Sort: top/takeOrdered " + str(n) + " elemens")
-        top = self._executor_data.getPartitionTools().newMemoryPartition(n * len(input))
         logger.info("Sort: local partition top/takeOrdered")
-        cmp = comparator if comparator is not None else lambda a, b: a < b
-        for part in input:
-            for item in part:
-                self.__take_ordered_add(cmp, ascending, top, item, n)
+        runs = [self.__take_ordered_partition(part, key, ascending, n) for part in input]
+        elems = self.__take_ordered_merge(runs, key, ascending, n)
 
-        # logger.info("Sort: local executor top/takeOrdered")
-        logger.info("Sort: global top/takeOrdered")
-        self._executor_data.mpi().gather(top, 0)
+        logger.info("Sort: global tree top/takeOrdered")
+        elems = self.treeMerge(elems, lambda a, b: self.__take_ordered_merge([a, b], key, ascending, n))
 
         if self._executor_data.mpi().isRoot(0):
-            tmp = self._executor_data.getPartitionTools().newPartitionGroup()
-            tmp.add(top)
-            self.__localSort(tmp, comparator, ascending)
-            self.resizeMemoryPartition(top, n)
+            top = self._executor_data.getPartitionTools().newMemoryPartition(n)
+            writer = top.writeIterator()
+            for elem in elems:
+                writer.write(elem)
             output.add(top)
 
         self._executor_data.setPartitions(output)
 
-    def __take_ordered_add(self, comparator, ascending, top, elem, n):
-        inner = top._inner()
-        if len(inner) == 0:
-            inner.append(elem)
-            return
-        if len(inner) == n:
-            if comparator(inner[-1], elem) == ascending or not (comparator(elem, inner[-1]) == ascending):
-                return
-            i = self.__searchRange(elem, top, comparator, ascending)
-        else:
-            i = self.__searchRange(elem, top, comparator, ascending)
-            inner.append(elem)
-
-        inner[i + 1:len(inner)] = inner[i:len(inner) - 1]
-        inner[i] = elem
+    def __take_ordered_partition(self, part, key, ascending, n):
+        if n <= 0:
+            return []
+        if key is None and self._executor_data.getPartitionTools().isMemory(part) and \
+                type(part._inner()).__name__ == 'INumpyWrapper':
+            import numpy
+            array = part._inner().usedArray()
+            if n < len(array):
+                if ascending:
+                    array = numpy.partition(array, n - 1)[0:n]
+                else:
+                    array = numpy.partition(array, len(array) - n)[len(array) - n:]
+            array = numpy.sort(array)
+            if not ascending:
+                array = array[::-1]
+            return array.tolist()
+        if ascending:
+            return heapq.nsmallest(n, part, key=key)
+        return heapq.nlargest(n, part, key=key)
+
+    def __take_ordered_merge(self, runs, key, ascending, n):
+        return list(islice(heapq.merge(*runs, key=key, reverse=not ascending), n))
 
     def __max_impl(self, comparator, ascending):
         input = self._executor_data.getPartitions()
@@ -60,6 +60,8 @@ class IPartitionGroup:
 	def __init__(self):
 		self.__partitions = list()
 		self.__cache = False
+		# How elements are placed across executors, None when unknown
+		self.__partitioner = None
 
 	def __setitem__(self, index, value):
 		self.__partitions[index] = value
@@ -98,12 +100,14 @@ class IPartitionGroup:
 		copy = IPartitionGroup()
 		for p in self.__partitions:
 			copy.add(p.clone())
+		copy.setPartitioner(self.__partitioner)
 		return copy
 
 	def shadowCopy(self):
 		copy = IPartitionGroup()
 		for p in self.__partitions:
 			copy.add(p)
+		copy.setPartitioner(self.__partitioner)
 		return copy
 
 	def cache(self, value=None):
@@ -111,6 +115,12 @@ class IPartitionGroup:
 			self.__cache = value
 		return self.__cache
 
+	def partitioner(self):
+		return self.__partitioner
+
+	def setPartitioner(self, partitioner):
+		self.__partitioner = partitioner
+
 
 def copy(readIterator, writeIterator):
 	n = 0
@@ -389,4 +389,14 @@ class IRawWriteIterator(IWriteIterator):
 			self.__partition._type = type_id
 			self.__partition._header = header
 		self.__fast_write(obj)
-		self.write = self.__fast_write
+		# A closure instead of a bound method, the iterator must not reference itself or
+		# the partition (and its disk files) would only be released by the garbage collector
+		partition = self.__partition
+		protocol = self.__protocol
+		elem_write = self.__write
+
+		def fast_write(obj):
+			partition._elements += 1
+			elem_write(protocol, obj)
+
+		self.write = fast_write
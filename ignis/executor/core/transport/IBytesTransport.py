@@ -14,4 +14,5 @@ class IBytesTransport(TTransportBase):
 		consumed = min(len(self.__bytes) - self.__pos, sz)
 		old_pos = self.__pos
 		self.__pos += consumed
-		return self.__bytes[old_pos:self.__pos]
+		# Copied so that no view of a memoryview source outlives the read
+		return bytes(self.__bytes[old_pos:self.__pos])
@@ -1,6 +1,8 @@
+from ignis.executor.api.function.IBatchFunction import IBatchFunction
 from ignis.executor.api.function.IFunction import IFunction
 from ignis.executor.api.function.IFunction0 import IFunction0
 from ignis.executor.api.function.IFunction2 import IFunction2
+from ignis.executor.api.function.IVectorFunction import IVectorFunction
 from ignis.executor.api.function.IVoidFunction import IVoidFunction
 from ignis.executor.api.function.IVoidFunction0 import IVoidFunction0
 
@@ -21,12 +23,45 @@ class MapInt(IFunction):
         return str(v)
 
 
+class MapAddVarInt(IFunction):
+
+    def before(self, context):
+        self.__add = context.vars()["add"]
+
+    def call(self, v, context):
+        return v + self.__add
+
+
+class MapErrorInt(IFunction):
+
+    def call(self, v, context):
+        raise ValueError("map error")
+
+
 class FilterInt(IFunction):
 
     def call(self, v, context):
         return v % 2 == 0
 
 
+class MapBatchInt(IBatchFunction):
+
+    def callBatch(self, elems, context):
+        return [str(v) for v in elems]
+
+
+class MapVectorInt(IVectorFunction):
+
+    def call(self, array, context):
+        return array * 2
+
+
+class FilterVectorInt(IVectorFunction):
+
+    def call(self, array, context):
+        return array % 2 == 0
+
+
 class FlatmapString(IFunction):
 
     def call(self, v, context):
@@ -68,6 +103,13 @@ class MapExecutorInt(IVoidFunction):
                 part[i] += 1
 
 
+class MapExecutorPairKeyInt(IVoidFunction):
+    def call(self, parts, context):
+        for part in parts:
+            for i in range(len(part)):
+                part[i] = (part[i][0] + 1, part[i][1])
+
+
 class MapExecutorToString(IFunction):
     def call(self, parts, context):
         v = list()
@@ -101,6 +143,11 @@ class SortString(IFunction2):
         return v1 < v2
 
 
+class SortKeyInt(IFunction):
+    def call(self, v, context):
+        return v
+
+
 class MapValuesInt(IFunction):
     def call(self, v, context):
         return str(v)
@@ -116,6 +163,11 @@ class ZeroInt(IFunction0):
         return 0
 
 
+class OneInt(IFunction0):
+    def call(self, context):
+        return 1
+
+
 class ReduceIntToString(IFunction2):
     def call(self, v1, v2, context):
         return v1 + str(v2)
@@ -126,6 +178,23 @@ class ZeroString(IFunction0):
         return ""
 
 
+class CreateCombinerSetString(IFunction):
+    def call(self, v, context):
+        return {v}
+
+
+class MergeValueSetString(IFunction2):
+    def call(self, v1, v2, context):
+        v1.add(v2)
+        return v1
+
+
+class MergeCombinersSetString(IFunction2):
+    def call(self, v1, v2, context):
+        v1.update(v2)
+        return v1
+
+
 class ForeachInt(IVoidFunction):
     def call(self, v, context):
         context.vars()["test"] = True
@@ -146,4 +215,10 @@ class ForeachExecutorString(IVoidFunction):
 class PartitionByStr(IFunction):
 
     def call(self, e, context):
-        return hash(e)
\ No newline at end of file
+        return hash(e)
+
+
+class PartitionByKeyStr(IFunction):
+
+    def call(self, e, context):
+        return hash(str(e[0]))
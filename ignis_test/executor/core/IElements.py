@@ -21,6 +21,13 @@ class IElementsBytes(IElements):
         return [random.randint(0, 255) for i in range(0, n)]
 
 
+class IElementsInt8(IElements):
+
+    def create(self, n, seed):
+        random.seed(seed)
+        return [random.randint(-128, 127) for i in range(0, n)]
+
+
 class IElementsStr(IElements):
 
     def create(self, n, seed):
@@ -24,6 +24,15 @@ class ILibraryLoaderTest(unittest.TestCase):
 		result = self.__executor_data.loadLibrary(self.__asSource("lambda x, y: x / y")).call(8, 2, context)
 		self.assertEqual(result, 4)
 
+	def test_loadStrLambdaBatch(self):
+		context = self.__executor_data.getContext()
+		result = self.__executor_data.loadLibrary(self.__asSource("lambda x: x * x")).callBatch([2, 3, 4], context)
+		self.assertEqual(result, [4, 9, 16])
+
+		result = self.__executor_data.loadLibrary(self.__asSource("def f(x, c):\n  return x * x")).callBatch([2, 3],
+		                                                                                                  context)
+		self.assertEqual(result, [4, 9])
+
 	def test_loadStrFunction(self):
 		context = self.__executor_data.getContext()
 		result = self.__executor_data.loadLibrary(self.__asSource("def f(x, c):\n  return x * x")).call(4, context)
@@ -0,0 +1,53 @@
+import hashlib
+import random
+import sys
+import timeit
+
+from ignis.executor.core.IShuffleHash import shuffleHash
+
+# Per element cost of the shuffle hash against the built-in hash and the previous blake2b hash, run with:
+#   python -m ignis_test.executor.core.IShuffleHashBenchmark [elements] [repeats]
+
+
+def _blake2b(x):
+	if isinstance(x, str):
+		x = x.encode("utf-8")
+	return int.from_bytes(hashlib.blake2b(x, digest_size=8).digest(), "little")
+
+
+def _blake2bTuple(x):
+	h = 0x345678
+	for item in x:
+		h = ((h * 1000003) ^ (_blake2bTuple(item) if isinstance(item, tuple) else
+		                      _blake2b(item) if isinstance(item, (str, bytes)) else item)) & 0xFFFFFFFFFFFFFFFF
+	return h ^ len(x)
+
+
+class IShuffleHashBenchmark:
+
+	def __init__(self, n, repeat):
+		self.__n = n
+		self.__repeat = repeat
+
+	def run(self):
+		random.seed(0)
+		words = ["key" + str(random.randint(0, 10 ** 9)) for _ in range(self.__n)]
+		self.__case("str", words, _blake2b)
+		self.__case("bytes", [word.encode("utf-8") for word in words], _blake2b)
+		self.__case("tuple(str, int)", [(word, i) for i, word in enumerate(words)], _blake2bTuple)
+		self.__case("tuple(str, float)", [(word, i + 0.5) for i, word in enumerate(words)], None)
+
+	def __case(self, name, elems, previous):
+		def cost(f):
+			return min(timeit.repeat(lambda: [f(elem) for elem in elems], number=1, repeat=self.__repeat)) / \
+			       len(elems) * 1e9
+
+		line = "%-18s shuffleHash %7.0f ns  hash %7.0f ns" % (name, cost(shuffleHash), cost(hash))
+		if previous is not None:
+			line += "  blake2b %7.0f ns" % cost(previous)
+		print(line)
+
+
+if __name__ == '__main__':
+	IShuffleHashBenchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 100000,
+	                      int(sys.argv[2]) if len(sys.argv) > 2 else 5).run()
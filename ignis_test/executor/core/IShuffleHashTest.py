@@ -0,0 +1,65 @@
+import collections
+import enum
+import unittest
+import zlib
+
+from ignis.executor.core.IShuffleHash import shuffleHash, shuffleHashArray
+
+
+class Color(enum.Enum):
+	RED = 1
+
+
+class Size(enum.IntEnum):
+	SMALL = 5
+
+
+class Key:
+
+	def __hash__(self):
+		return 42
+
+
+class IShuffleHashTest(unittest.TestCase):
+
+	def test_stableValues(self):
+		self.assertEqual(shuffleHash(7), 7)
+		self.assertEqual(shuffleHash(-1), 2 ** 64 - 1)
+		self.assertEqual(shuffleHash(7.0), shuffleHash(7))
+		checksum = zlib.adler32(b"ignis") << 32 | zlib.crc32(b"ignis")
+		self.assertEqual(shuffleHash("ignis"), checksum)
+		self.assertEqual(shuffleHash(b"ignis"), checksum)
+		self.assertEqual(0x063d021bcb8b3bd9, checksum)
+		# Partitions are chosen with the low bits
+		self.assertEqual(len({shuffleHash(str(i)) % 7 for i in range(100)}), 7)
+		self.assertEqual(shuffleHash(None), 0)
+		self.assertNotEqual(shuffleHash((1, 2)), shuffleHash((2, 1)))
+
+	def test_equalTuples(self):
+		# Equal keys must be routed to the same partition
+		Point = collections.namedtuple("Point", "x y")
+		self.assertEqual(shuffleHash((7, "a")), shuffleHash((7.0, "a")))
+		self.assertEqual(shuffleHash((7, "a")), shuffleHash(Point(7, "a")))
+		self.assertEqual(shuffleHash((1, None)), shuffleHash((True, None)))
+		self.assertEqual(shuffleHash((-1, b"a")), shuffleHash((-1.0, bytearray(b"a"))))
+		self.assertEqual(shuffleHash((5,)), shuffleHash((Size.SMALL,)))
+		self.assertEqual(shuffleHash(("a", (1, 2))), shuffleHash(("a", (1.0, 2))))
+		self.assertNotEqual(shuffleHash(("a", (1, 2))), shuffleHash(("a", (2, 1))))
+
+	def test_otherTypes(self):
+		# Values are pinned, they must not depend on PYTHONHASHSEED
+		self.assertEqual(shuffleHash(frozenset({"a", "b", 1})), 0xbf823172b8a54fe5)
+		self.assertEqual(shuffleHash(frozenset({1, "b", "a"})), shuffleHash(frozenset({"a", "b", 1})))
+		self.assertEqual(shuffleHash(Color.RED), shuffleHash(("Color", "RED")))
+		self.assertEqual(shuffleHash(Size.SMALL), shuffleHash(5))
+		# Other hashable types use their own __hash__
+		self.assertEqual(shuffleHash(Key()), 42)
+		with self.assertRaises(TypeError):
+			shuffleHash([1])
+
+	def test_numpyArray(self):
+		import numpy
+		ints = numpy.arange(-50, 50, dtype=numpy.int64)
+		self.assertEqual(list(shuffleHashArray(ints)), [shuffleHash(int(x)) for x in ints])
+		floats = numpy.array([0.5, -3.0, 1e300, float("nan")])
+		self.assertEqual(list(shuffleHashArray(floats)), [shuffleHash(float(x)) for x in floats])
@@ -0,0 +1,73 @@
+import random
+import sys
+import timeit
+
+from ignis.executor.core.io import INumpy
+from ignis.executor.core.modules.impl.ISortImpl import ISortImpl
+from ignis_test.executor.core.modules.IModuleTest import IModuleTest
+
+# Local sort engine against the comparison sort it replaced, run with:
+#   python -m ignis_test.executor.core.ISortBenchmark [elements] [repeats]
+
+
+class ISortBenchmark(IModuleTest):
+
+	def __init__(self, n, repeat):
+		IModuleTest.__init__(self)
+		self.__sort = ISortImpl(self._executor_data)
+		self.__n = n
+		self.__repeat = repeat
+		self._executor_data.getContext().props()["ignis.partition.type"] = "Memory"
+
+	def run(self):
+		import numpy
+		random.seed(0)
+		numbers = [random.randint(0, 255) for _ in range(self.__n)]
+		self.__case("bytearray", bytearray, None, numbers, lambda elems: bytearray(sorted(elems)))
+
+		INumpy.enable()
+		self.__case("uint8", numpy.ndarray, numpy.uint8, numbers, lambda elems: numpy.sort(elems))
+		self.__case("int64 small range", numpy.ndarray, numpy.int64, numbers, lambda elems: numpy.sort(elems))
+		numbers = [random.randint(-128, 127) for _ in range(self.__n)]
+		self.__case("int8", numpy.ndarray, numpy.int8, numbers, lambda elems: numpy.sort(elems))
+		numbers = [random.randint(-2 ** 40, 2 ** 40) for _ in range(self.__n)]
+		self.__case("int64 wide range", numpy.ndarray, numpy.int64, numbers, lambda elems: numpy.sort(elems))
+		INumpy.disable()
+
+	def __case(self, name, cls, dtype, numbers, baseline):
+		self._executor_data.getContext().vars()['STORAGE_CLASS'] = cls
+		if dtype is not None:
+			self._executor_data.getContext().vars()['STORAGE_CLASS_DTYPE'] = dtype
+
+		def load():
+			self.loadToPartitions(numbers, 1)
+
+		def engine():
+			self.__sort.sortWithinPartitions(True)
+
+		if dtype is None:
+			raw = cls(numbers)
+		else:
+			import numpy
+			raw = numpy.array(numbers, dtype=dtype)
+
+		load()
+		engine()
+		result = self._executor_data.getPartitions()[0]._inner()
+		elems = result.usedArray() if dtype is not None else result
+		if list(elems) != list(baseline(raw)):
+			raise RuntimeError(name + ": engine result differs from the baseline")
+
+		# Loading the partition is not part of the sort
+		engine_time = min(timeit.repeat(engine, setup=load, number=1, repeat=self.__repeat))
+		baseline_time = min(timeit.repeat(lambda: baseline(raw), number=1, repeat=self.__repeat))
+		print("%-18s engine %8.2f ms  baseline %8.2f ms  speedup %5.2fx" % (
+			name, engine_time * 1000, baseline_time * 1000, baseline_time / max(engine_time, 1e-9)))
+
+
+if __name__ == '__main__':
+	import ignis.executor.core.ILog as Ilog
+
+	Ilog.enable(False)
+	ISortBenchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000,
+	               int(sys.argv[2]) if len(sys.argv) > 2 else 5).run()
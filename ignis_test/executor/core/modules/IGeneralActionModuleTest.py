@@ -1,6 +1,8 @@
 import unittest
 
+from ignis.executor.core.io import INumpy
 from ignis.executor.core.modules.IGeneralActionModule import IGeneralActionModule
+from ignis.rpc.executor.exception.ttypes import IExecutorException
 from ignis.rpc.source.ttypes import IEncoded, ISource
 from ignis_test.executor.core.IElements import IElementsInt, IElementsStr, IElementsPair
 from ignis_test.executor.core.modules.IModuleTest import IModuleTest
@@ -25,9 +27,39 @@ class IGeneralActionModuleTest(IModuleTest, unittest.TestCase):
     def test_reduceString(self):
         self.__reduceTest("ReduceString", "RawMemory", IElementsStr)
 
+    def test_reduceStringMultiCore(self):
+        self._executor_data.getContext().props()["ignis.executor.cores"] = "2"
+        self._executor_data.getContext().props()["ignis.modules.parallel.fork"] = "true"
+        self.__reduceTest("ReduceString", "Memory", IElementsStr)
+
     def test_treeReduceInt(self):
         self.__treeReduceTest("ReduceInt", "Memory", IElementsInt)
 
+    def test_reduceSumInt(self):
+        self.__reduceTest("ignis.sum", "Memory", IElementsInt)
+
+    def test_reduceSumLargeInt(self):
+        self._executor_data.getContext().props()["ignis.partition.type"] = "Memory"
+        np = self._executor_data.getContext().executors()
+        self.loadToPartitions([2 ** 62, 2 ** 62 - 1], 1)
+        self.__generalAction.reduce(ISource(obj=IEncoded(name="ignis.sum")))
+        result = self.getFromPartitions()
+
+        if self._executor_data.mpi().isRoot(0):
+            self.assertEqual([(2 ** 63 - 1) * np], result)
+        else:
+            self.assertEqual(0, len(result))
+
+    def test_reduceCountInvalid(self):
+        self._executor_data.getContext().props()["ignis.partition.type"] = "Memory"
+        self.loadToPartitions([1, 2, 3], 3)
+        with self.assertRaises(IExecutorException):
+            self.__generalAction.reduce(ISource(obj=IEncoded(name="ignis.count")))
+
+    def test_treeReduceFaninString(self):
+        self._executor_data.getContext().props()["ignis.modules.reduce.fanin"] = "3"
+        self.__treeReduceTest("ReduceString", "Memory", IElementsStr)
+
     def test_treeReduceString(self):
         self.__treeReduceTest("ReduceString", "RawMemory", IElementsStr)
 
@@ -40,6 +72,28 @@ class IGeneralActionModuleTest(IModuleTest, unittest.TestCase):
     def test_foldIntTest(self):
         self.__foldTest("ZeroInt", "ReduceInt", "Memory", IElementsInt)
 
+    def test_foldIntMultiCoreTest(self):
+        self._executor_data.getContext().props()["ignis.executor.cores"] = "2"
+        self._executor_data.getContext().props()["ignis.modules.parallel.fork"] = "true"
+        self.__foldTest("ZeroInt", "ReduceInt", "RawMemory", IElementsInt)
+
+    def test_foldNonNeutralZeroMultiCoreTest(self):
+        self._executor_data.getContext().props()["ignis.executor.cores"] = "2"
+        self._executor_data.getContext().props()["ignis.modules.parallel.fork"] = "true"
+        self._executor_data.getContext().props()["ignis.partition.type"] = "Memory"
+        np = self._executor_data.getContext().executors()
+        elems = IElementsInt().create(100 * 2 * np, 0)
+        local_elems = self.rankVector(elems)
+        self.loadToPartitions(local_elems, 4)
+        self.__generalAction.fold(self.newSource("OneInt"), self.newSource("ReduceInt"))
+        result = self.getFromPartitions()
+
+        if self._executor_data.mpi().isRoot(0):
+            # The zero value is applied once per executor, not once per partition
+            self.assertEqual([sum(elems) + np], result)
+        else:
+            self.assertEqual(0, len(result))
+
     def test_treeFoldStringTest(self):
         self.__treeFoldTest("ZeroString", "ReduceString", "Memory", IElementsStr)
 
@@ -58,6 +112,19 @@ class IGeneralActionModuleTest(IModuleTest, unittest.TestCase):
     def test_topInt(self):
         self.__topTest("Memory", IElementsInt)
 
+    def test_topIntNumpy(self):
+        INumpy.enable()
+        import numpy
+        self._executor_data.getContext().vars()['STORAGE_CLASS'] = numpy.ndarray
+        self._executor_data.getContext().vars()['STORAGE_CLASS_DTYPE'] = numpy.int64
+        self.__topTest("Memory", IElementsInt)
+        self.__topTest("Memory", IElementsInt, n=0)
+        INumpy.disable()
+
+    def test_topFaninInt(self):
+        self._executor_data.getContext().props()["ignis.modules.reduce.fanin"] = "3"
+        self.__topTest("Memory", IElementsInt)
+
     def test_customTopString(self):
         self.__customTopTest("SortString", "RawMemory", IElementsStr)
 
@@ -90,7 +157,10 @@ class IGeneralActionModuleTest(IModuleTest, unittest.TestCase):
         elems = IElements().create(100 * 2 * np, 0)
         local_elems = self.rankVector(elems)
         self.loadToPartitions(local_elems, 2)
-        self.__generalAction.reduce(self.newSource(name))
+        if name.startswith("ignis."):
+            self.__generalAction.reduce(ISource(obj=IEncoded(name=name)))
+        else:
+            self.__generalAction.reduce(self.newSource(name))
         result = self.getFromPartitions()
 
         if self._executor_data.mpi().isRoot(0):
@@ -228,10 +298,9 @@ class IGeneralActionModuleTest(IModuleTest, unittest.TestCase):
         self.__generalAction.foreachExecutor(self.newSource(name))
         self.assertTrue(self._executor_data.getContext().vars()["test"])
 
-    def __topTest(self, partitionType, IElements):
+    def __topTest(self, partitionType, IElements, n=30):
         self._executor_data.getContext().props()["ignis.partition.type"] = partitionType
         np = self._executor_data.getContext().executors()
-        n = 30
         elems = IElements().create(100 * 5 * np, 0)
         local_elems = self.rankVector(elems)
         self.loadToPartitions(local_elems, 5)
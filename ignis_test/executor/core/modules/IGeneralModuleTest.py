@@ -1,8 +1,16 @@
+import os
 import unittest
 
+from ignis.driver.api.ISource import ISource as IDriverSource
 from ignis.executor.core.io import INumpy
 from ignis.executor.core.modules.IGeneralModule import IGeneralModule
-from ignis_test.executor.core.IElements import IElementsInt, IElementsStr, IElementsBytes, IElementsPair
+from ignis.executor.core.modules.impl.IReduceImpl import IReduceImpl
+from ignis.executor.core.modules.impl.IRepartitionImpl import IRepartitionImpl
+from ignis.executor.core.modules.impl.ISortImpl import ISortImpl
+from ignis.rpc.executor.exception.ttypes import IExecutorException
+from ignis.rpc.source.ttypes import ISource, IEncoded
+from ignis_test.executor.core.IElements import IElementsInt, IElementsInt8, IElementsStr, IElementsBytes, \
+	IElementsPair
 from ignis_test.executor.core.modules.IModuleTest import IModuleTest
 
 
@@ -12,6 +20,10 @@ class IGeneralModuleTest(IModuleTest, unittest.TestCase):
 		IModuleTest.__init__(self)
 		unittest.TestCase.__init__(self, *args, **kwargs)
 		self.__general = IGeneralModule(self._executor_data)
+		# Operations without an RPC entry yet are tested on their implementation
+		self.__reduce = IReduceImpl(self._executor_data)
+		self.__repartition = IRepartitionImpl(self._executor_data)
+		self.__sort = ISortImpl(self._executor_data)
 		props = self._executor_data.getContext().props()
 		props["ignis.modules.sort.samples"] = "0.1"
 		props["ignis.modules.sort.resampling"] = "False"
@@ -22,15 +34,63 @@ class IGeneralModuleTest(IModuleTest, unittest.TestCase):
 	def test_mapInt(self):
 		self.__mapTest("MapInt", "Memory", IElementsInt)
 
+	def test_mapIntMultiCore(self):
+		self._executor_data.getContext().props()["ignis.executor.cores"] = "2"
+		self._executor_data.getContext().props()["ignis.modules.parallel.fork"] = "true"
+		self.__mapTest("MapInt", "RawMemory", IElementsInt)
+
+	def test_mapIntMultiCoreManyPartitions(self):
+		self._executor_data.getContext().props()["ignis.executor.cores"] = "2"
+		self._executor_data.getContext().props()["ignis.modules.parallel.fork"] = "true"
+		segments = self.__sharedSegments()
+		self.__mapTest("MapInt", "RawMemory", IElementsInt, partitions=8)
+		self.assertEqual(segments, self.__sharedSegments())
+
+	def test_mapErrorMultiCore(self):
+		self._executor_data.getContext().props()["ignis.executor.cores"] = "2"
+		self._executor_data.getContext().props()["ignis.modules.parallel.fork"] = "true"
+		self._executor_data.getContext().props()["ignis.partition.type"] = "RawMemory"
+		segments = self.__sharedSegments()
+		self.loadToPartitions(IElementsInt().create(100 * 8, 0), 8)
+		with self.assertRaises(IExecutorException):
+			self.__general.map_(self.newSource("MapErrorInt"))
+		self.assertEqual(segments, self.__sharedSegments())
+
 	def test_filterInt(self):
 		self.__filterTest("FilterInt", "RawMemory", IElementsInt)
 
+	def test_mapBatchInt(self):
+		self.__batchTest("MapBatchInt", "RawMemory", IElementsInt)
+
+	def test_mapVectorIntNumpy(self):
+		INumpy.enable()
+		import numpy
+		self._executor_data.getContext().vars()['STORAGE_CLASS'] = numpy.ndarray
+		self._executor_data.getContext().vars()['STORAGE_CLASS_DTYPE'] = numpy.int64
+		self.__vectorTest("MapVectorInt", "FilterVectorInt", "Memory", IElementsInt)
+		INumpy.disable()
+
+	def test_mapVectorInt(self):
+		self.__vectorTest("MapVectorInt", "FilterVectorInt", "RawMemory", IElementsInt)
+
+	def test_mapVectorPairError(self):
+		self._executor_data.getContext().props()["ignis.partition.type"] = "RawMemory"
+		self.loadToPartitions(IElementsPair((IElementsInt, IElementsInt)).create(100 * 2, 0), 2)
+		with self.assertRaises(IExecutorException):
+			self.__general.map_(self.newSource("MapVectorInt"))
+
 	def test_flatmapString(self):
 		self.__flatmapTest("FlatmapString", "Memory", IElementsStr)
 
 	def test_keyByStringInt(self):
 		self.__keyByTest("KeyByString", "RawMemory", IElementsStr)
 
+	def test_fusedPipelineInt(self):
+		self.__fusedPipelineTest("FilterInt", "MapInt", "FlatmapString", "KeyByString", "RawMemory", IElementsInt)
+
+	def test_fusedPipelineVarsInt(self):
+		self.__fusedPipelineVarsTest("MapAddVarInt", "Memory", IElementsInt)
+
 	def test_mapWithIndexInt(self):
 		self.__mapWithIndexTest("MapWithIndexInt", "Memory", IElementsInt)
 
@@ -59,6 +119,18 @@ class IGeneralModuleTest(IModuleTest, unittest.TestCase):
 		self._executor_data.getContext().vars()['STORAGE_CLASS'] = bytearray
 		self.__sortTest("SortInt", "Memory", IElementsBytes)
 
+	def test_sortBasicIntBytes(self):
+		self._executor_data.getContext().vars()['STORAGE_CLASS'] = bytearray
+		self.__sortTest(None, "Memory", IElementsBytes)
+
+	def test_sortBasicBytesNumpy(self):
+		INumpy.enable()
+		import numpy
+		self._executor_data.getContext().vars()['STORAGE_CLASS'] = numpy.ndarray
+		self._executor_data.getContext().vars()['STORAGE_CLASS_DTYPE'] = numpy.int64
+		self.__sortTest(None, "Memory", IElementsBytes)
+		INumpy.disable()
+
 	def test_resamplingSortInt(self):
 		self.__sortTest("SortInt", "Memory", IElementsInt, True)
 
@@ -70,15 +142,152 @@ class IGeneralModuleTest(IModuleTest, unittest.TestCase):
 		self.__sortTest("SortInt", "Memory", IElementsBytes)
 		INumpy.disable()
 
+	def test_sortInt8Numpy(self):
+		INumpy.enable()
+		import numpy
+		self._executor_data.getContext().vars()['STORAGE_CLASS'] = numpy.ndarray
+		self._executor_data.getContext().vars()['STORAGE_CLASS_DTYPE'] = numpy.int8
+		self.__sortTest(None, "Memory", IElementsInt8)
+		INumpy.disable()
+
+	def test_sortFloatNanNumpy(self):
+		INumpy.enable()
+		import numpy
+		self._executor_data.getContext().vars()['STORAGE_CLASS'] = numpy.ndarray
+		self._executor_data.getContext().vars()['STORAGE_CLASS_DTYPE'] = numpy.float64
+		self._executor_data.getContext().props()["ignis.partition.type"] = "Memory"
+		np = self._executor_data.getContext().executors()
+		elems = [float("nan") if i % 7 == 0 else float((i * 37) % 101) for i in range(100 * 4 * np)]
+		local_elems = self.rankVector(elems)
+		self.loadToPartitions(local_elems, 4)
+		self.__general.sort(True)
+		result = self.getFromPartitions()
+		INumpy.disable()
+
+		self.loadToPartitions(result, 1)
+		self._executor_data.mpi().gather(self._executor_data.getPartitions()[0], 0)
+		result = self.getFromPartitions()
+
+		if self._executor_data.mpi().isRoot(0):
+			numbers = [e for e in result if e == e]
+			self.assertEqual(len(elems), len(result))
+			self.assertEqual(sorted(e for e in elems if e == e), numbers)
+
+	def test_sortBasicIntNumpy(self):
+		INumpy.enable()
+		import numpy
+		self._executor_data.getContext().vars()['STORAGE_CLASS'] = numpy.ndarray
+		self._executor_data.getContext().vars()['STORAGE_CLASS_DTYPE'] = numpy.int64
+		self.__sortTest(None, "Memory", IElementsInt)
+		INumpy.disable()
+
+	def test_externalSortInt(self):
+		self._executor_data.getContext().props()["ignis.modules.sort.memory"] = "200"
+		self.__sortTest("SortInt", "RawMemory", IElementsInt)
+
+	def test_externalSortKeyInt(self):
+		self._executor_data.getContext().props()["ignis.modules.sort.memory"] = "200"
+		self.__sortTest("SortKeyInt", "RawMemory", IElementsInt)
+
+	def test_sortSkewInt(self):
+		self.__sortSkewTest(None, "Memory")
+
+	def test_sortKeySkewInt(self):
+		self.__sortSkewTest("SortKeyInt", "RawMemory")
+
+	def test_sortSkewIntNumpy(self):
+		INumpy.enable()
+		import numpy
+		self._executor_data.getContext().vars()['STORAGE_CLASS'] = numpy.ndarray
+		self._executor_data.getContext().vars()['STORAGE_CLASS_DTYPE'] = numpy.int64
+		self.__sortSkewTest(None, "Memory")
+		INumpy.disable()
+
 	def test_sortString(self):
 		self.__sortTest("SortString", "RawMemory", IElementsStr)
 
+	def test_sortKeyInt(self):
+		self.__sortTest("SortKeyInt", "RawMemory", IElementsInt)
+
+	def test_resamplingSortKeyInt(self):
+		self.__sortTest("SortKeyInt", "Memory", IElementsInt, True)
+
 	def test_distinctInt(self):
 		self.__distinctTest("Memory", IElementsInt)
 
+	def test_distinctIntNumpy(self):
+		INumpy.enable()
+		import numpy
+		self._executor_data.getContext().vars()['STORAGE_CLASS'] = numpy.ndarray
+		self._executor_data.getContext().vars()['STORAGE_CLASS_DTYPE'] = numpy.int64
+		self.__distinctTest("Memory", IElementsInt)
+		INumpy.disable()
+
 	def test_joinStringInt(self):
 		self.__joinTest("RawMemory", (IElementsStr, IElementsInt))
 
+	def test_hashJoinStringInt(self):
+		self._executor_data.getContext().props()["ignis.modules.join.type"] = "hash"
+		self.__joinTest("RawMemory", (IElementsStr, IElementsInt))
+
+	def test_broadcastJoinIntInt(self):
+		self._executor_data.getContext().props()["ignis.modules.join.type"] = "broadcast"
+		self.__joinTest("Memory", (IElementsInt, IElementsInt))
+
+	def test_autoJoinIntInt(self):
+		self._executor_data.getContext().props()["ignis.modules.join.type"] = "auto"
+		self.__joinTest("Memory", (IElementsInt, IElementsInt), numPartitions=5)
+
+	def test_sortMergeJoinStringInt(self):
+		self._executor_data.getContext().props()["ignis.modules.join.type"] = "sortmerge"
+		self.__joinTest("RawMemory", (IElementsStr, IElementsInt))
+
+	def test_spillSortMergeJoinIntInt(self):
+		self._executor_data.getContext().props()["ignis.modules.join.type"] = "sortmerge"
+		self._executor_data.getContext().props()["ignis.modules.reduce.memory"] = "1K"
+		self.__joinTest("RawMemory", (IElementsInt, IElementsInt))
+
+	def test_bloomJoinStringInt(self):
+		self._executor_data.getContext().props()["ignis.modules.join.type"] = "hash"
+		self._executor_data.getContext().props()["ignis.modules.join.bloom"] = "true"
+		self.__joinTest("RawMemory", (IElementsStr, IElementsInt))
+
+	def test_bloomLeftOuterJoinIntInt(self):
+		self._executor_data.getContext().props()["ignis.modules.join.bloom"] = "true"
+		self.__joinTest("Memory", (IElementsInt, IElementsInt), "left")
+
+	def test_bloomRightOuterJoinIntInt(self):
+		self._executor_data.getContext().props()["ignis.modules.join.bloom"] = "true"
+		self.__joinTest("Memory", (IElementsInt, IElementsInt), "right")
+
+	def test_joinInvalidType(self):
+		self._executor_data.getContext().props()["ignis.modules.join.type"] = "sort-merge"
+		self.loadToPartitions([(1, 1)], 1)
+		self._executor_data.setVariable("other", self._executor_data.getPartitions())
+		self.loadToPartitions([(1, 2)], 1)
+		with self.assertRaises(IExecutorException):
+			self.__general.join("other", 1)
+
+	def test_skewJoinIntInt(self):
+		self.__skewJoinTest("Memory")
+
+	def test_skewJoinRawIntInt(self):
+		self.__skewJoinTest("RawMemory")
+
+	def test_leftOuterJoinStringInt(self):
+		self.__joinTest("Memory", (IElementsStr, IElementsInt), "left")
+
+	def test_fullOuterJoinIntInt(self):
+		self.__joinTest("RawMemory", (IElementsInt, IElementsInt), "full")
+
+	def test_sortMergeRightOuterJoinIntInt(self):
+		self._executor_data.getContext().props()["ignis.modules.join.type"] = "sortmerge"
+		self.__joinTest("Memory", (IElementsInt, IElementsInt), "right")
+
+	def test_sortMergeFullOuterJoinStringInt(self):
+		self._executor_data.getContext().props()["ignis.modules.join.type"] = "sortmerge"
+		self.__joinTest("RawMemory", (IElementsStr, IElementsInt), "full")
+
 	def test_unionInt(self):
 		self.__unionTest("Memory", IElementsInt, True)
 
@@ -97,10 +306,61 @@ class IGeneralModuleTest(IModuleTest, unittest.TestCase):
 	def test_reduceByKeyIntString(self):
 		self.__reduceByKeyTest("ReduceString", "RawMemory", (IElementsInt, IElementsStr))
 
+	def test_reduceByKeySumIntInt(self):
+		self.__reduceByKeyOperationTest("ignis.sum", "Memory", (IElementsInt, IElementsInt))
+
+	def test_reduceByKeySumLargeInt(self):
+		self._executor_data.getContext().props()["ignis.partition.type"] = "Memory"
+		np = self._executor_data.getContext().executors()
+		self.loadToPartitions([(1, 2 ** 62), (1, 2 ** 62)], 1)
+		self.__general.reduceByKey(ISource(obj=IEncoded(name="ignis.sum")), 2, True)
+		result = self.getFromPartitions()
+
+		self.loadToPartitions(result, 1)
+		self._executor_data.mpi().gather(self._executor_data.getPartitions()[0], 0)
+		result = self.getFromPartitions()
+
+		if self._executor_data.mpi().isRoot(0):
+			self.assertEqual([(1, 2 ** 63 * np)], result)
+
+	def test_reduceByKeyMeanIntInt(self):
+		self.__reduceByKeyOperationTest("ignis.mean", "RawMemory", (IElementsInt, IElementsInt))
+
+	def test_reduceByKeyCountIntString(self):
+		self.__reduceByKeyOperationTest("ignis.count", "Memory", (IElementsInt, IElementsStr))
+
+	def test_reduceByKeyMaxStringInt(self):
+		self.__reduceByKeyOperationTest("ignis.max", "Memory", (IElementsStr, IElementsInt))
+
+	def test_reduceByKeyThenGroupByKeyIntInt(self):
+		self.__partitionerReuseTest("Memory", (IElementsInt, IElementsInt))
+
+	def test_mapExecutorThenGroupByKeyIntInt(self):
+		self.__partitionerResetTest("Memory", (IElementsInt, IElementsInt))
+
 	def test_aggregateByKeyIntInt(self):
 		self.__aggregateByKeyTest("ZeroString", "ReduceIntToString", "ReduceString", "Memory",
 		                          (IElementsInt, IElementsInt))
 
+	def test_spillGroupByKeyIntString(self):
+		self._executor_data.getContext().props()["ignis.modules.reduce.memory"] = "2K"
+		self.__groupByKeyTest("Memory", (IElementsInt, IElementsStr))
+
+	def test_spillReduceByKeyIntString(self):
+		self._executor_data.getContext().props()["ignis.modules.reduce.memory"] = "2K"
+		self.__reduceByKeyTest("ReduceString", "RawMemory", (IElementsInt, IElementsStr))
+
+	def test_spillAggregateByKeyIntInt(self):
+		self._executor_data.getContext().props()["ignis.modules.reduce.memory"] = "2K"
+		self.__aggregateByKeyTest("ZeroString", "ReduceIntToString", "ReduceString", "Memory",
+		                          (IElementsInt, IElementsInt))
+
+	def test_combineByKeyIntString(self):
+		self.__combineByKeyTest(True, "Memory", (IElementsInt, IElementsStr))
+
+	def test_combineByKeyNoLocalIntString(self):
+		self.__combineByKeyTest(False, "RawMemory", (IElementsInt, IElementsStr))
+
 	def test_foldByKeyIntInt(self):
 		self.__foldByKeyTest("ZeroInt", "ReduceInt", "Memory", (IElementsInt, IElementsInt))
 
@@ -125,6 +385,26 @@ class IGeneralModuleTest(IModuleTest, unittest.TestCase):
 	def test_partitionByHash(self):
 		self.__partitionByHashTest("RawMemory", IElementsStr)
 
+	def test_partitionByHashIntNumpy(self):
+		INumpy.enable()
+		import numpy
+		self._executor_data.getContext().vars()['STORAGE_CLASS'] = numpy.ndarray
+		self._executor_data.getContext().vars()['STORAGE_CLASS_DTYPE'] = numpy.int64
+		self.__partitionByHashTest("Memory", IElementsInt)
+		INumpy.disable()
+
+	def test_repartitionAndSortWithinPartitions(self):
+		np = self._executor_data.getContext().executors()
+		elems = IElementsPair((IElementsStr, IElementsInt)).create(100 * 2 * np, 0)
+		self.__repartitionAndSortTest("PartitionByKeyStr", "Memory", elems)
+
+	def test_repartitionAndSortWithinPartitionsUncomparableValues(self):
+		np = self._executor_data.getContext().executors()
+		keys = IElementsInt().create(100 * 2 * np, 0)
+		elems = [(k, None if i % 3 == 0 else {"v": i}) for i, k in enumerate(keys)]
+		elems += [(k, 5) for k in keys[::10]]
+		self.__repartitionAndSortTest("PartitionByKeyStr", "Memory", elems)
+
 	# -------------------------------------Impl-------------------------------------
 
 	def __executeToTest(self, name, partitionType):
@@ -135,10 +415,15 @@ class IGeneralModuleTest(IModuleTest, unittest.TestCase):
 
 		self.assertEqual(elems, result)
 
-	def __mapTest(self, name, partitionType, IElements):
+	def __sharedSegments(self):
+		if not os.path.isdir("/dev/shm"):
+			return set()
+		return {name for name in os.listdir("/dev/shm") if name.startswith("psm_")}
+
+	def __mapTest(self, name, partitionType, IElements, partitions=2):
 		self._executor_data.getContext().props()["ignis.partition.type"] = partitionType
-		elems = IElements().create(100 * 2, 0)
-		self.loadToPartitions(elems, 2)
+		elems = IElements().create(100 * partitions, 0)
+		self.loadToPartitions(elems, partitions)
 		self.__general.map_(self.newSource(name))
 		result = self.getFromPartitions()
 
@@ -157,6 +442,32 @@ class IGeneralModuleTest(IModuleTest, unittest.TestCase):
 				self.assertEqual(elems[i], result[j])
 				j += 1
 
+	def __batchTest(self, name, partitionType, IElements):
+		self._executor_data.getContext().props()["ignis.partition.type"] = partitionType
+		self._executor_data.getContext().props()["ignis.modules.batch.size"] = "7"
+		elems = IElements().create(100 * 2, 0)
+		self.loadToPartitions(elems, 2)
+		self.__general.filter(ISource(obj=IEncoded(name="lambda x: x % 2 == 0")))
+		self.__general.map_(self.newSource(name))
+		self.__general.keyBy(ISource(obj=IEncoded(name="lambda x: len(x)")))
+		self.__general.mapValues(ISource(obj=IEncoded(name="lambda x: int(x)")))
+		result = self.getFromPartitions()
+
+		self.assertEqual([(len(str(elem)), elem) for elem in elems if elem % 2 == 0], result)
+
+	def __vectorTest(self, map, filter, partitionType, IElements):
+		self._executor_data.getContext().props()["ignis.partition.type"] = partitionType
+		elems = IElements().create(100 * 2, 0)
+		self.loadToPartitions(elems, 2)
+		self.__general.filter(self.newSource(filter))
+		self.__general.map_(self.newSource(map))
+		if partitionType == "Memory":
+			for part in self._executor_data.getPartitions():
+				self.assertEqual("INumpyWrapper", type(part._inner()).__name__)
+		result = self.getFromPartitions()
+
+		self.assertEqual([elem * 2 for elem in elems if elem % 2 == 0], list(result))
+
 	def __flatmapTest(self, name, partitionType, IElements):
 		self._executor_data.getContext().props()["ignis.partition.type"] = partitionType
 		elems = IElements().create(100 * 2, 0)
@@ -179,6 +490,39 @@ class IGeneralModuleTest(IModuleTest, unittest.TestCase):
 			self.assertEqual(len(elems[i]), result[i][0])
 			self.assertEqual(elems[i], result[i][1])
 
+	def __fusedPipelineTest(self, filter, map, flatmap, keyBy, partitionType, IElements):
+		self._executor_data.getContext().props()["ignis.partition.type"] = partitionType
+		self._executor_data.getContext().props()["ignis.modules.pipe.fusion"] = "true"
+		elems = IElements().create(100 * 2, 0)
+		self.loadToPartitions(elems, 2)
+		self.__general.filter(self.newSource(filter))
+		self.__general.map_(self.newSource(map))
+		self.__general.flatmap(self.newSource(flatmap))
+		self.__general.keyBy(self.newSource(keyBy))
+		self.assertEqual(4, len(self._executor_data.getPipeline()))
+		result = self.getFromPartitions()
+		self.assertIsNone(self._executor_data.getPipeline())
+
+		expected = list()
+		for elem in elems:
+			if elem % 2 == 0:
+				expected.append((len(str(elem)), str(elem)))
+				expected.append((len(str(elem)), str(elem)))
+
+		self.assertEqual(expected, result)
+
+	def __fusedPipelineVarsTest(self, name, partitionType, IElements):
+		self._executor_data.getContext().props()["ignis.partition.type"] = partitionType
+		self._executor_data.getContext().props()["ignis.modules.pipe.fusion"] = "true"
+		elems = IElements().create(100 * 2, 0)
+		self.loadToPartitions(elems, 2)
+		# Both sources set the same variable, each stage must see its own value
+		self.__general.map_(IDriverSource(self._library + ":" + name, add=1).rpc())
+		self.__general.map_(IDriverSource(self._library + ":" + name, add=10).rpc())
+		result = self.getFromPartitions()
+
+		self.assertEqual([elem + 11 for elem in elems], result)
+
 	def __mapWithIndexTest(self, name, partitionType, IElements):
 		self._executor_data.getContext().props()["ignis.partition.type"] = partitionType
 		elems = IElements().create(100 * 2, 0)
@@ -281,6 +625,33 @@ class IGeneralModuleTest(IModuleTest, unittest.TestCase):
 			for i in range(0, len(result)):
 				self.assertEqual(result[i], elems[i])
 
+	def __sortSkewTest(self, name, partitionType):
+		self._executor_data.getContext().props()["ignis.partition.type"] = partitionType
+		np = self._executor_data.getContext().executors()
+		elems = IElementsInt().create(100 * 4 * np, 0)
+		elems = [e if i % 4 == 0 else 7 for i, e in enumerate(elems)]
+		local_elems = self.rankVector(elems)
+		self.loadToPartitions(local_elems, 4)
+		if name is None:
+			self.__general.sort(True)
+		else:
+			self.__general.sortBy(self.newSource(name), True)
+
+		for part in self._executor_data.getPartitions():
+			self.assertLess(len(part), len(elems) / 2)
+
+		result = self.getFromPartitions()
+		for i in range(1, len(result)):
+			self.assertGreaterEqual(result[i], result[i - 1])
+
+		self.loadToPartitions(result, 1)
+		self._executor_data.mpi().gather(self._executor_data.getPartitions()[0], 0)
+		result = self.getFromPartitions()
+
+		if self._executor_data.mpi().isRoot(0):
+			elems.sort()
+			self.assertEqual(elems, result)
+
 	def __distinctTest(self, partitionType, IElements):
 		self._executor_data.getContext().props()["ignis.partition.type"] = partitionType
 		elems = IElements().create(100 * 2, 0)
@@ -297,7 +668,7 @@ class IGeneralModuleTest(IModuleTest, unittest.TestCase):
 			self.assertEqual(len(result), len(distinct))
 			self.assertEqual(set(result), distinct)
 
-	def __joinTest(self, partitionType, IElements):
+	def __joinTest(self, partitionType, IElements, how="inner", numPartitions=2):
 		self._executor_data.getContext().props()["ignis.partition.type"] = partitionType
 		np = self._executor_data.getContext().executors()
 		elems = IElementsPair(IElements).create(50 * 2 * np, 0)
@@ -309,7 +680,11 @@ class IGeneralModuleTest(IModuleTest, unittest.TestCase):
 		self._executor_data.setVariable("other", self._executor_data.getPartitions())
 		self.loadToPartitions(local_elems, 2)
 
-		self.__general.join("other", 2)
+		if how == "inner":
+			self.__general.join("other", numPartitions)
+		else:
+			getattr(self.__reduce, how + "OuterJoin")("other", numPartitions)
+		self.assertEqual(numPartitions, len(self._executor_data.getPartitions()))
 		result = self.getFromPartitions()
 
 		self.loadToPartitions(result, 1)
@@ -328,12 +703,57 @@ class IGeneralModuleTest(IModuleTest, unittest.TestCase):
 				if key in m1:
 					for value1 in m1[key]:
 						expected.append((key, (value1, value2)))
+				elif how in ("right", "full"):
+					expected.append((key, (None, value2)))
+			if how in ("left", "full"):
+				keys2 = set(key for key, _ in elems2)
+				for key, value1 in elems:
+					if key not in keys2:
+						expected.append((key, (value1, None)))
 
-			result.sort()
-			expected.sort()
+			result.sort(key=str)
+			expected.sort(key=str)
 
 			self.assertEqual(result, expected)
 
+	def __skewJoinTest(self, partitionType):
+		self._executor_data.getContext().props()["ignis.partition.type"] = partitionType
+		self._executor_data.getContext().props()["ignis.modules.join.type"] = "skew"
+		np = self._executor_data.getContext().executors()
+		elems = IElementsPair((IElementsInt, IElementsInt)).create(100 * 4 * np, 0)
+		elems = [e if i % 4 == 0 else (7, e[1]) for i, e in enumerate(elems)]
+		elems2 = IElementsPair((IElementsInt, IElementsInt)).create(24 * np, 1)
+		elems2 = [e if i % 8 != 0 else (7, e[1]) for i, e in enumerate(elems2)]
+		local_elems = self.rankVector(elems)
+		local_elems2 = self.rankVector(elems2)
+
+		self.loadToPartitions(local_elems2, 2)
+		self._executor_data.setVariable("other", self._executor_data.getPartitions())
+		self.loadToPartitions(local_elems, 4)
+
+		self.__general.join("other", 4)
+		result = self.getFromPartitions()
+
+		m1 = dict()
+		for key, value in elems:
+			m1.setdefault(key, list()).append(value)
+		expected = list()
+		for key, value2 in elems2:
+			for value1 in m1.get(key, ()):
+				expected.append((key, (value1, value2)))
+
+		for part in self._executor_data.getPartitions():
+			self.assertLess(len(part), len(expected) / 2)
+
+		self.loadToPartitions(result, 1)
+		self._executor_data.mpi().gather(self._executor_data.getPartitions()[0], 0)
+		result = self.getFromPartitions()
+
+		if self._executor_data.mpi().isRoot(0):
+			result.sort()
+			expected.sort()
+			self.assertEqual(expected, result)
+
 	def __unionTest(self, partitionType, IElements, preserveOrder):
 		self._executor_data.getContext().props()["ignis.partition.type"] = partitionType
 		np = self._executor_data.getContext().executors()
@@ -434,6 +854,87 @@ class IGeneralModuleTest(IModuleTest, unittest.TestCase):
 			for item in result:
 				self.assertEqual(self._normalize(counts[item[0]]), self._normalize(item[1]))
 
+	def __reduceByKeyOperationTest(self, name, partitionType, IElements):
+		self._executor_data.getContext().props()["ignis.partition.type"] = partitionType
+		np = self._executor_data.getContext().executors()
+		elems = IElementsPair(IElements).create(100 * 2 * np, 0)
+		local_elems = self.rankVector(elems)
+		self.loadToPartitions(local_elems, 2)
+		self.__general.reduceByKey(ISource(obj=IEncoded(name=name)), 2, True)
+		result = self.getFromPartitions()
+
+		groups = dict()
+		for key, value in elems:
+			groups.setdefault(key, list()).append(value)
+		operations = {
+			"ignis.sum": sum,
+			"ignis.max": max,
+			"ignis.count": len,
+			"ignis.mean": lambda values: sum(values) / len(values)
+		}
+
+		self.loadToPartitions(result, 1)
+		self._executor_data.mpi().gather(self._executor_data.getPartitions()[0], 0)
+		result = self.getFromPartitions()
+
+		if self._executor_data.mpi().isRoot(0):
+			self.assertEqual(len(groups), len(result))
+			for key, value in result:
+				self.assertEqual(operations[name](groups[key]), value)
+
+	def __partitionerReuseTest(self, partitionType, IElements):
+		self._executor_data.getContext().props()["ignis.partition.type"] = partitionType
+		np = self._executor_data.getContext().executors()
+		elems = IElementsPair(IElements).create(100 * 2 * np, 0)
+		local_elems = self.rankVector(elems)
+		self.loadToPartitions(local_elems, 2)
+		self.__general.reduceByKey(self.newSource("ReduceInt"), 3, True)
+		self.assertEqual(("hash", 3), self._executor_data.getPartitions().partitioner())
+		self.__general.mapValues(self.newSource("MapValuesInt"))
+		self.assertEqual(("hash", 3), self._executor_data.getPartitions().partitioner())
+		self.__general.groupByKey(3)
+		result = self.getFromPartitions()
+
+		counts = dict()
+		for key, value in elems:
+			counts[key] = counts.get(key, 0) + value
+
+		self.loadToPartitions(result, 1)
+		self._executor_data.mpi().gather(self._executor_data.getPartitions()[0], 0)
+		result = self.getFromPartitions()
+
+		if self._executor_data.mpi().isRoot(0):
+			self.assertEqual(len(counts), len(result))
+			for key, values in result:
+				self.assertEqual([str(counts[key])], values)
+
+	def __partitionerResetTest(self, partitionType, IElements):
+		self._executor_data.getContext().props()["ignis.partition.type"] = partitionType
+		np = self._executor_data.getContext().executors()
+		elems = IElementsPair(IElements).create(100 * 2 * np, 0)
+		local_elems = self.rankVector(elems)
+		self.loadToPartitions(local_elems, 2)
+		self.__general.reduceByKey(self.newSource("ReduceInt"), 2, True)
+		self.__general.mapExecutor(self.newSource("MapExecutorPairKeyInt"))
+		self.assertIsNone(self._executor_data.getPartitions().partitioner())
+		# An outdated partitioner must not break the key placement
+		self._executor_data.getPartitions().setPartitioner(("hash", 2))
+		self.__general.groupByKey(2)
+		result = self.getFromPartitions()
+
+		counts = dict()
+		for key, value in elems:
+			counts[key + 1] = counts.get(key + 1, 0) + value
+
+		self.loadToPartitions(result, 1)
+		self._executor_data.mpi().gather(self._executor_data.getPartitions()[0], 0)
+		result = self.getFromPartitions()
+
+		if self._executor_data.mpi().isRoot(0):
+			self.assertEqual(len(counts), len(result))
+			for key, values in result:
+				self.assertEqual([counts[key]], values)
+
 	def __aggregateByKeyTest(self, zero, seq, comb, partitionType, IElements):
 		self._executor_data.getContext().props()["ignis.partition.type"] = partitionType
 		np = self._executor_data.getContext().executors()
@@ -458,6 +959,31 @@ class IGeneralModuleTest(IModuleTest, unittest.TestCase):
 			for item in result:
 				self.assertEqual(self._normalize(counts[item[0]]), self._normalize(item[1]))
 
+	def __combineByKeyTest(self, localCombine, partitionType, IElements):
+		self._executor_data.getContext().props()["ignis.partition.type"] = partitionType
+		np = self._executor_data.getContext().executors()
+		elems = IElementsPair(IElements).create(100 * 2 * np, 0)
+		local_elems = self.rankVector(elems)
+		self.loadToPartitions(local_elems, 2)
+		self.__reduce.combineByKey(self._executor_data.loadLibrary(self.newSource("CreateCombinerSetString")),
+		                           self._executor_data.loadLibrary(self.newSource("MergeValueSetString")),
+		                           self._executor_data.loadLibrary(self.newSource("MergeCombinersSetString")), 2,
+		                           localCombine)
+		result = self.getFromPartitions()
+
+		groups = dict()
+		for key, value in elems:
+			groups.setdefault(key, set()).add(value)
+
+		self.loadToPartitions(result, 1)
+		self._executor_data.mpi().gather(self._executor_data.getPartitions()[0], 0)
+		result = self.getFromPartitions()
+
+		if self._executor_data.mpi().isRoot(0):
+			self.assertEqual(len(groups), len(result))
+			for key, value in result:
+				self.assertEqual(groups[key], value)
+
 	def __foldByKeyTest(self, zero, name, partitionType, IElements):
 		self._executor_data.getContext().props()["ignis.partition.type"] = partitionType
 		np = self._executor_data.getContext().executors()
@@ -563,6 +1089,27 @@ class IGeneralModuleTest(IModuleTest, unittest.TestCase):
 			self.assertEqual(min(expected.values()), 0)
 			self.assertEqual(max(expected.values()), 0)
 
+	def __repartitionAndSortTest(self, name, partitionType, elems):
+		self._executor_data.getContext().props()["ignis.partition.type"] = partitionType
+		np = self._executor_data.getContext().executors()
+		local_elems = self.rankVector(elems)
+		self.loadToPartitions(local_elems, 2)
+
+		self.__repartition.partitionBy(self._executor_data.loadLibrary(self.newSource(name)), 2 * np - 1)
+		self.__sort.sortByKeyWithinPartitions(True)
+
+		for part in self._executor_data.getPartitions():
+			part_keys = [e[0] for e in part]
+			self.assertEqual(sorted(part_keys), part_keys)
+		result = self.getFromPartitions()
+
+		self.loadToPartitions(result, 1)
+		self._executor_data.mpi().gather(self._executor_data.getPartitions()[0], 0)
+		result = self.getFromPartitions()
+
+		if self._executor_data.mpi().isRoot(0):
+			self.assertEqual(sorted(map(repr, elems)), sorted(map(repr, result)))
+
 	def __partitionByRandomTest(self, partitionType, IElements):
 		self._executor_data.getContext().props()["ignis.partition.type"] = partitionType
 		np = self._executor_data.getContext().executors()
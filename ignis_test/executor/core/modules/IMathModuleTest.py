@@ -1,7 +1,9 @@
 import unittest
 
 from ignis.driver.api.ISource import ISource
+from ignis.executor.core.io import INumpy
 from ignis.executor.core.modules.IMathModule import IMathModule
+from ignis.executor.core.modules.impl.IMathImpl import IMathImpl
 from ignis_test.executor.core.IElements import IElementsInt, IElementsPair
 from ignis_test.executor.core.modules.IModuleTest import IModuleTest
 
@@ -12,6 +14,8 @@ class IMathModuleTest(IModuleTest, unittest.TestCase):
         IModuleTest.__init__(self)
         unittest.TestCase.__init__(self, *args, **kwargs)
         self.__math = IMathModule(self._executor_data)
+        # Operations without an RPC entry yet are tested on their implementation
+        self.__math_impl = IMathImpl(self._executor_data)
         props = self._executor_data.getContext().props()
         props["ignis.modules.sort.samples"] = "2"
 
@@ -130,6 +134,105 @@ class IMathModuleTest(IModuleTest, unittest.TestCase):
             for key, count in result:
                 self.assertEqual(counts[key], count)
 
+    def test_countApproxDistinct(self):
+        self._executor_data.getContext().props()["ignis.partition.type"] = "RawMemory"
+        np = self._executor_data.getContext().executors()
+        elems = [i % (500 * np) for i in range(1000 * np)]
+        local_elems = self.rankVector(elems)
+        self.loadToPartitions(local_elems, 2)
+        result = self.__math_impl.countApproxDistinct(0.05)
+
+        self.assertLess(abs(result - 500 * np), 500 * np * 0.15)
+
+    def test_countApproxDistinctByKey(self):
+        self._executor_data.getContext().props()["ignis.partition.type"] = "Memory"
+        np = self._executor_data.getContext().executors()
+        elems = [(i % 3, i % (100 * (i % 3 + 1))) for i in range(900 * np)]
+        local_elems = self.rankVector(elems)
+        self.loadToPartitions(local_elems, 2)
+        self.__math_impl.countApproxDistinctByKey(0.05)
+        result = self.getFromPartitions()
+
+        distinct = dict()
+        for key, value in elems:
+            distinct.setdefault(key, set()).add(value)
+
+        self.loadToPartitions(result, 1)
+        self._executor_data.mpi().gather(self._executor_data.getPartitions()[0], 0)
+        result = self.getFromPartitions()
+
+        if self._executor_data.mpi().isRoot(0):
+            self.assertEqual(len(distinct), len(result))
+            for key, count in result:
+                self.assertLess(abs(count - len(distinct[key])), len(distinct[key]) * 0.15)
+
+    def test_approxQuantile(self):
+        self._executor_data.getContext().props()["ignis.partition.type"] = "Memory"
+        np = self._executor_data.getContext().executors()
+        elems = IElementsInt().create(1000 * np, 0)
+        local_elems = self.rankVector(elems)
+        self.loadToPartitions(local_elems, 2)
+        probabilities = [0, 0.1, 0.5, 0.9, 1]
+        self.__math_impl.approxQuantile(probabilities, 0.05)
+        result = self.getFromPartitions()
+
+        if self._executor_data.mpi().isRoot(0):
+            elems.sort()
+            self.assertEqual(len(probabilities), len(result))
+            self.assertEqual(elems[0], result[0])
+            self.assertEqual(elems[-1], result[-1])
+            for p, value in zip(probabilities, result):
+                rank = elems.index(value)
+                self.assertLess(abs(rank - p * len(elems)), 2 * 0.05 * len(elems))
+        else:
+            self.assertEqual(0, len(result))
+
+    def test_stats(self):
+        self.__statsTest("Memory")
+
+    def test_statsNumpy(self):
+        INumpy.enable()
+        import numpy
+        self._executor_data.getContext().vars()['STORAGE_CLASS'] = numpy.ndarray
+        self._executor_data.getContext().vars()['STORAGE_CLASS_DTYPE'] = numpy.int64
+        self.__statsTest("Memory")
+        INumpy.disable()
+
+    def test_statsLargeIntNumpy(self):
+        INumpy.enable()
+        import numpy
+        self._executor_data.getContext().vars()['STORAGE_CLASS'] = numpy.ndarray
+        self._executor_data.getContext().vars()['STORAGE_CLASS_DTYPE'] = numpy.int64
+        self._executor_data.getContext().props()["ignis.partition.type"] = "Memory"
+        np = self._executor_data.getContext().executors()
+        elems = [2 ** 62 - i for i in range(100 * 2 * np)]
+        local_elems = self.rankVector(elems)
+        self.loadToPartitions(local_elems, 2)
+        self.__math_impl.stats()
+        result = self.getFromPartitions()
+        INumpy.disable()
+
+        if self._executor_data.mpi().isRoot(0):
+            self.assertEqual(1, len(result))
+            stats = result[0]
+            self.assertEqual(len(elems), stats["count"])
+            self.assertEqual(sum(elems), stats["sum"])
+            self.assertEqual(min(elems), stats["min"])
+            self.assertEqual(max(elems), stats["max"])
+        else:
+            self.assertEqual(0, len(result))
+
+    def test_histogram(self):
+        self.__histogramTest("RawMemory", [0, 10, 100, 1000, 10000])
+
+    def test_histogramNumpy(self):
+        INumpy.enable()
+        import numpy
+        self._executor_data.getContext().vars()['STORAGE_CLASS'] = numpy.ndarray
+        self._executor_data.getContext().vars()['STORAGE_CLASS_DTYPE'] = numpy.int64
+        self.__histogramTest("Memory", 7)
+        INumpy.disable()
+
     def test_countByValue(self):
         self._executor_data.getContext().props()["ignis.partition.type"] = "Memory"
         np = self._executor_data.getContext().executors()
@@ -153,3 +256,53 @@ class IMathModuleTest(IModuleTest, unittest.TestCase):
         if self._executor_data.mpi().isRoot(0):
             for value, count in result:
                 self.assertEqual(counts[value], count)
+
+    # -------------------------------------Impl-------------------------------------
+
+    def __statsTest(self, partitionType):
+        self._executor_data.getContext().props()["ignis.partition.type"] = partitionType
+        np = self._executor_data.getContext().executors()
+        elems = IElementsInt().create(100 * 2 * np, 0)
+        local_elems = self.rankVector(elems)
+        self.loadToPartitions(local_elems, 2)
+        self.__math_impl.stats()
+        result = self.getFromPartitions()
+
+        if self._executor_data.mpi().isRoot(0):
+            self.assertEqual(1, len(result))
+            stats = result[0]
+            mean = sum(elems) / len(elems)
+            self.assertEqual(len(elems), stats["count"])
+            self.assertEqual(sum(elems), stats["sum"])
+            self.assertAlmostEqual(mean, stats["mean"])
+            self.assertAlmostEqual(sum((x - mean) ** 2 for x in elems) / len(elems), stats["variance"], places=4)
+            self.assertEqual(min(elems), stats["min"])
+            self.assertEqual(max(elems), stats["max"])
+        else:
+            self.assertEqual(0, len(result))
+
+    def __histogramTest(self, partitionType, buckets):
+        self._executor_data.getContext().props()["ignis.partition.type"] = partitionType
+        np = self._executor_data.getContext().executors()
+        elems = IElementsInt().create(100 * 2 * np, 0)
+        local_elems = self.rankVector(elems)
+        self.loadToPartitions(local_elems, 2)
+        self.__math_impl.histogram(buckets)
+        result = self.getFromPartitions()
+
+        if self._executor_data.mpi().isRoot(0):
+            self.assertEqual(1, len(result))
+            limits, counts = result[0]
+            if isinstance(buckets, int):
+                self.assertEqual(buckets + 1, len(limits))
+                self.assertEqual(min(elems), limits[0])
+                self.assertEqual(max(elems), limits[-1])
+            expected = [0] * (len(limits) - 1)
+            for x in elems:
+                for i in range(len(expected)):
+                    if limits[i] <= x < limits[i + 1] or (i == len(expected) - 1 and x == limits[-1]):
+                        expected[i] += 1
+                        break
+            self.assertEqual(expected, counts)
+        else:
+            self.assertEqual(0, len(result))